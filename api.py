@@ -1,17 +1,30 @@
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Header, Depends
-from fastapi.responses import HTMLResponse, FileResponse
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, HTTPException, Header, Depends, BackgroundTasks, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse, Response
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import List, Optional
-import json
+from functools import lru_cache
+import asyncio
+import atexit
+import gzip
+import hmac
+import httpx
+import orjson
 from pathlib import Path
 import logging
-from pywebpush import webpush, WebPushException
+import logging.handlers
+import queue
+from pywebpush import WebPushException
 import os
-from datetime import datetime
-from urllib.parse import urlparse
+import time
 
 from database import Database
+from push import VapidSigner, check_push_response, encode_push, push_audience
 
 BASE_DIR = Path(__file__).resolve().parent
 load_dotenv(BASE_DIR / ".env")
@@ -26,6 +39,7 @@ DATA_DIR = SHARED_DIR / "data"
 VAPID_PRIVATE_KEY = os.getenv("VAPID_PRIVATE_KEY")
 VAPID_PUBLIC_KEY = os.getenv("VAPID_PUBLIC_KEY")
 VAPID_SUBJECT = os.getenv("VAPID_SUBJECT")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 LOGS_DIR = SHARED_DIR / "logs"
 
 DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -34,18 +48,46 @@ LOGS_DIR.mkdir(parents=True, exist_ok=True)
 db = Database()
 LOG_FILE = LOGS_DIR / "api.log"
 
+#  Request handlers only enqueue records, the listener thread does the file/console I/O
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(
+    log_queue,
+    logging.FileHandler(LOG_FILE, encoding="utf-8"),
+    logging.StreamHandler(),
+    respect_handler_level=True
+)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE, encoding="utf-8"),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
 
 logger = logging.getLogger("API")
 
-app = FastAPI(title="DMV Monitor API", version="2.0.0")  # docs_url=None, openapi_url=None
+#  Shared client for push services, keeps connections alive between sends.
+#  FCM and APNs multiplex over HTTP/2, so one connection carries many pushes
+PUSH_CLIENT = httpx.AsyncClient(
+    http2=True,
+    timeout=10,
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=100)
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await PUSH_CLIENT.aclose()
+
+
+app = FastAPI(title="DMV Monitor API", version="2.0.0", lifespan=lifespan,
+              default_response_class=ORJSONResponse)  # docs_url=None, openapi_url=None
+
+GZIP_MIN_SIZE = 1024
+GZIP_LEVEL = 5
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL)
 
 
 def require_admin(x_admin_token: str | None = Header(default=None)):
@@ -53,7 +95,7 @@ def require_admin(x_admin_token: str | None = Header(default=None)):
     Admin protection.
     """
 
-    if x_admin_token == os.getenv("ADMIN_TOKEN"):
+    if ADMIN_TOKEN and x_admin_token and hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
         return
     raise HTTPException(status_code=401, detail="Unauthorized")
 
@@ -67,55 +109,6 @@ def require_admin(x_admin_token: str | None = Header(default=None)):
 #      allow_headers=["*"],
 #  )
 
-#  DMV Categories
-DMV_CATEGORIES = {
-    "commercial_driver_license": {
-        "name": "Commercial Driver License (CDL or CLP)",
-        "description": "CDL or CLP for commercial vehicles"
-    },
-    "existing_driver_license": {
-        "name": "Existing Driver License",
-        "description": "Renew, replace, update, or upgrade to REAL ID"
-    },
-    "first_driver_license_or_permit": {
-        "name": "First Driver License or Permit (age 18 or older)",
-        "description": "New driver age 18+, new NC resident, REAL ID"
-    },
-    "medical_reexam": {
-        "name": "Medical Re-exam",
-        "description": "Required medical re-examination (NCDMV told you to come in)"
-    },
-    "motorcycle_endorsement": {
-        "name": "Motorcycle Endorsement",
-        "description": "Add motorcycle endorsement to your license"
-    },
-    "motorcycle_skills_test": {
-        "name": "Motorcycle Skills Test",
-        "description": "Schedule a motorcycle driving skills test"
-    },
-    "out_of_state_license_transfer": {
-        "name": "Out-of-State License Transfer",
-        "description": "Transfer your driver license from another state"
-    },
-    "state_identification_card": {
-        "name": "State Identification Card",
-        "description": "State ID card (not a driver license), REAL ID"
-    },
-    "teen_driver_level_1": {
-        "name": "Teen Driver - Learner Permit (under 18, Level 1)",
-        "description": "Limited learner permit - ages 15-17"
-    },
-    "teen_driver_level_2": {
-        "name": "Teen Driver - Road Test (under 18, Level 2)",
-        "description": "Limited provisional license - ages 16-17; Level 1 permit"
-    },
-    "teen_driver_level_3": {
-        "name": "Teen Driver - Full Provisional License (under 18, Level 3)",
-        "description": "Full provisional license - ages 16-17; Level 2 license"
-    },
-}
-
-
 #  ============================================================================
 #  REQUEST/RESPONSE MODELS
 #  ============================================================================
@@ -152,6 +145,8 @@ class SubscriptionResponse(BaseModel):
 
 class CategoryInfo(BaseModel):
     """DMV category information"""
+    model_config = ConfigDict(frozen=True)
+
     key: str
     name: str
     description: str
@@ -170,55 +165,134 @@ class AvailabilityItem(BaseModel):
     last_checked: str
 
 
+#  DMV Categories
+DMV_CATEGORIES = (
+    CategoryInfo(
+        key="commercial_driver_license",
+        name="Commercial Driver License (CDL or CLP)",
+        description="CDL or CLP for commercial vehicles"
+    ),
+    CategoryInfo(
+        key="existing_driver_license",
+        name="Existing Driver License",
+        description="Renew, replace, update, or upgrade to REAL ID"
+    ),
+    CategoryInfo(
+        key="first_driver_license_or_permit",
+        name="First Driver License or Permit (age 18 or older)",
+        description="New driver age 18+, new NC resident, REAL ID"
+    ),
+    CategoryInfo(
+        key="medical_reexam",
+        name="Medical Re-exam",
+        description="Required medical re-examination (NCDMV told you to come in)"
+    ),
+    CategoryInfo(
+        key="motorcycle_endorsement",
+        name="Motorcycle Endorsement",
+        description="Add motorcycle endorsement to your license"
+    ),
+    CategoryInfo(
+        key="motorcycle_skills_test",
+        name="Motorcycle Skills Test",
+        description="Schedule a motorcycle driving skills test"
+    ),
+    CategoryInfo(
+        key="out_of_state_license_transfer",
+        name="Out-of-State License Transfer",
+        description="Transfer your driver license from another state"
+    ),
+    CategoryInfo(
+        key="state_identification_card",
+        name="State Identification Card",
+        description="State ID card (not a driver license), REAL ID"
+    ),
+    CategoryInfo(
+        key="teen_driver_level_1",
+        name="Teen Driver - Learner Permit (under 18, Level 1)",
+        description="Limited learner permit - ages 15-17"
+    ),
+    CategoryInfo(
+        key="teen_driver_level_2",
+        name="Teen Driver - Road Test (under 18, Level 2)",
+        description="Limited provisional license - ages 16-17; Level 1 permit"
+    ),
+    CategoryInfo(
+        key="teen_driver_level_3",
+        name="Teen Driver - Full Provisional License (under 18, Level 3)",
+        description="Full provisional license - ages 16-17; Level 2 license"
+    ),
+)
+
+#  Static payloads, serialized once at import
+CATEGORIES_JSON = orjson.dumps([category.model_dump() for category in DMV_CATEGORIES])
+VAPID_PUBLIC_KEY_JSON = orjson.dumps({"public_key": VAPID_PUBLIC_KEY})
+
+
 #  ============================================================================
 #  HELPER FUNCTIONS
 #  ============================================================================
 
-def send_push_notification(subscription_info: dict, title: str, body: str,
-                           url: str = "/") -> bool:
+def subscription_payload(row: dict) -> dict:
+    """
+    SubscriptionResponse fields of a database row.
+    Rows are already typed by the database layer, so they skip a second model validation.
+    """
+    return {
+        'user_id': row['user_id'],
+        'categories': row['categories'],
+        'locations': row['locations'],
+        'date_range_days': row['date_range_days'],
+        'created_at': row['created_at']
+    }
+
+
+#  Signed VAPID headers per push service, shared by every subscriber of it
+VAPID_SIGNER = VapidSigner(VAPID_PRIVATE_KEY, VAPID_SUBJECT)
+
+
+@lru_cache(maxsize=256)
+def _notification_payload(title: str, body: str, url: str) -> bytes:
+    notification_data = {
+        "title": title,
+        "body": body,
+        "icon": "/icon-192.png",
+        "badge": "/icon-192.png",
+        "tag": "dmv-appointment",
+        "requireInteraction": True,
+        "data": {
+            "url": url
+        }
+    }
+    return orjson.dumps(notification_data)
+
+
+@lru_cache(maxsize=1024)
+def _parsed_push_subscription(push_subscription: str) -> dict:
+    """Decoded subscription JSON, memoized by its text so repeated sends skip the decode"""
+    return orjson.loads(push_subscription)
+
+
+async def send_push_notification(subscription_info: dict, title: str, body: str,
+                                 url: str = "/") -> bool:
     """Send push notification to a subscriber"""
+    return await _deliver_push(subscription_info, _notification_payload(title, body, url))
+
+
+async def _deliver_push(subscription_info: dict, payload: bytes) -> bool:
+    """Encrypt an already serialized payload for one subscriber and post it to their push service"""
     try:
         if not subscription_info or 'push_subscription' not in subscription_info:
             logger.warning("No push subscription found")
             return False
 
-        push_sub = json.loads(subscription_info['push_subscription'])
+        push_sub = _parsed_push_subscription(subscription_info['push_subscription'])
         endpoint = push_sub.get('endpoint', '')
 
-        #  Determine audience based on endpoint
-        if 'apple.com' in endpoint:
-            aud = 'https://web.push.apple.com'
-        elif 'fcm.googleapis.com' in endpoint:
-            aud = 'https://fcm.googleapis.com'
-        elif 'mozilla.com' in endpoint:
-            aud = 'https://updates.push.services.mozilla.com'
-        else:
-            parsed = urlparse(endpoint)
-            aud = f"{parsed.scheme}://{parsed.netloc}"
+        content, headers = encode_push(push_sub, payload, VAPID_SIGNER.headers(push_audience(endpoint)))
 
-        vapid_claims = {
-            "sub": VAPID_SUBJECT,
-            "aud": aud
-        }
-
-        notification_data = {
-            "title": title,
-            "body": body,
-            "icon": "/icon-192.png",
-            "badge": "/icon-192.png",
-            "tag": "dmv-appointment",
-            "requireInteraction": True,
-            "data": {
-                "url": url
-            }
-        }
-
-        webpush(
-            subscription_info=push_sub,
-            data=json.dumps(notification_data),
-            vapid_private_key=VAPID_PRIVATE_KEY,
-            vapid_claims=vapid_claims
-        )
+        response = await PUSH_CLIENT.post(endpoint, content=content, headers=headers)
+        check_push_response(response, response.reason_phrase)
 
         logger.info("Push notification sent successfully")
         return True
@@ -238,147 +312,72 @@ def send_push_notification(subscription_info: dict, title: str, body: str,
 #  STATIC FILE SERVING
 #  ============================================================================
 
-@app.get("/customization-sheet", response_class=HTMLResponse)
-async def serve_customization_sheet():
-    """Serve the Home Customization sheet (standalone tool)."""
-    html_file = BASE_DIR / "cs-index.html"
-    if html_file.exists():
-        return FileResponse(html_file)
-    return HTMLResponse("<h1>customization.html not found</h1>", status_code=404)
-
-@app.get("/cs-styles.css")
-async def serve_cs_styles():
-    f = BASE_DIR / "cs-styles.css"
-    if f.exists():
-        return FileResponse(f, media_type="text/css")
-    return HTMLResponse("cs-styles.css not found", status_code=404)
-
-
-@app.get("/cs-app.js")
-async def serve_cs_app():
-    f = BASE_DIR / "cs-app.js"
-    if f.exists():
-        return FileResponse(f, media_type="application/javascript")
-    return HTMLResponse("cs-app.js not found", status_code=404)
-
-@app.get("/cs-manifest.json")
-async def serve_cs_manifest():
-    f = BASE_DIR / "cs-manifest.json"
-    if f.exists():
-        return FileResponse(f, media_type="application/json")
-    return HTMLResponse("cs-manifest.json not found", status_code=404)
-
-
-@app.get("/cs-sw.js")
-async def serve_cs_service_worker():
-    f = BASE_DIR / "cs-sw.js"
-    if f.exists():
-        return FileResponse(f, media_type="application/javascript")
-    return HTMLResponse("cs-sw.js not found", status_code=404)
+class PublicFiles(StaticFiles):
+    """StaticFiles limited to an allow-list, so sources and .env next to the assets are never served"""
+
+    def __init__(self, *, files: dict, **kwargs):
+        super().__init__(**kwargs)
+        self.files = files
+
+    def lookup_path(self, path: str):
+        if path not in self.files:
+            return "", None
+        return super().lookup_path(path)
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result,
+                                headers=self.files[Path(full_path).name])
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+#  Asset names are not content-hashed, so anything that changes on deploy is
+#  revalidated against its ETag on every load instead of being cached blindly
+REVALIDATE = {"Cache-Control": "no-cache"}
+SERVICE_WORKER = {"Cache-Control": "no-cache", "Service-Worker-Allowed": "/"}
+LONG_LIVED = {"Cache-Control": "public, max-age=86400"}
+
+PUBLIC_FILES = {
+    "style.css": REVALIDATE,
+    "app.js": REVALIDATE,
+    "sw.js": SERVICE_WORKER,
+    "manifest.json": REVALIDATE,
+    "icon-192.png": LONG_LIVED,
+    "icon-512.png": LONG_LIVED,
+    "cs-styles.css": REVALIDATE,
+    "cs-app.js": REVALIDATE,
+    "cs-manifest.json": REVALIDATE,
+    "cs-sw.js": SERVICE_WORKER,
+    "cs-icon-192.png": LONG_LIVED,
+    "cs-icon-512.png": LONG_LIVED,
+    "googlebe0bcdc73702fcd4.html": LONG_LIVED,
+    "sitemap.xml": LONG_LIVED,
+    "robots.txt": LONG_LIVED,
+}
 
 
-@app.get("/cs-icon-192.png")
-async def serve_cs_icon_192():
-    f = BASE_DIR / "cs-icon-192.png"
-    if f.exists():
-        return FileResponse(f, media_type="image/png")
-    return HTMLResponse("Icon not found", status_code=404)
+#  Page paths and their presence are resolved once, the handlers below do no path work
+INDEX_HTML = BASE_DIR / "index.html"
+INDEX_HTML_EXISTS = INDEX_HTML.is_file()
+CUSTOMIZATION_SHEET_HTML = BASE_DIR / "cs-index.html"
+CUSTOMIZATION_SHEET_HTML_EXISTS = CUSTOMIZATION_SHEET_HTML.is_file()
 
 
-@app.get("/cs-icon-512.png")
-async def serve_cs_icon_512():
-    f = BASE_DIR / "cs-icon-512.png"
-    if f.exists():
-        return FileResponse(f, media_type="image/png")
-    return HTMLResponse("Icon not found", status_code=404)
+@app.get("/customization-sheet", response_class=HTMLResponse)
+async def serve_customization_sheet():
+    """Serve the Home Customization sheet (standalone tool)."""
+    if CUSTOMIZATION_SHEET_HTML_EXISTS:
+        return FileResponse(CUSTOMIZATION_SHEET_HTML, headers=REVALIDATE)
+    return HTMLResponse("<h1>customization.html not found</h1>", status_code=404)
 
 @app.get("/", response_class=HTMLResponse)
 async def serve_index():
     """Serve main HTML UI"""
-    html_file = BASE_DIR / "index.html"
-    if html_file.exists():
-        return FileResponse(html_file)
+    if INDEX_HTML_EXISTS:
+        return FileResponse(INDEX_HTML, headers=REVALIDATE)
     return HTMLResponse("<h1>index.html not found</h1>", status_code=404)
 
-@app.get("/style.css")
-async def serve_style_css():
-    """Serve style.css"""
-    css_file = BASE_DIR / "style.css"
-    if css_file.exists():
-        return FileResponse(css_file, media_type="text/css")
-    return HTMLResponse("style.css not found", status_code=404)
-
-@app.get("/app.js")
-async def serve_app_js():
-    """Serve app.js"""
-    js_file = BASE_DIR / "app.js"
-    if js_file.exists():
-        return FileResponse(js_file, media_type="application/javascript")
-    return HTMLResponse("app.js not found", status_code=404)
-
-
-@app.get("/sw.js")
-async def serve_service_worker():
-    """Serve service worker"""
-    sw_file = BASE_DIR / "sw.js"
-    if sw_file.exists():
-        return FileResponse(sw_file, media_type="application/javascript")
-    return HTMLResponse("sw.js not found", status_code=404)
-
-
-@app.get("/manifest.json")
-async def serve_manifest():
-    """Serve PWA manifest"""
-    manifest_file = BASE_DIR / "manifest.json"
-    if manifest_file.exists():
-        return FileResponse(manifest_file, media_type="application/json")
-    return HTMLResponse("manifest.json not found", status_code=404)
-
-
-@app.get("/icon-192.png")
-async def serve_icon_192():
-    """Serve 192x192 icon"""
-    icon_file = BASE_DIR / "icon-192.png"
-    if icon_file.exists():
-        return FileResponse(icon_file, media_type="image/png")
-    return HTMLResponse("Icon not found", status_code=404)
-
-
-@app.get("/icon-512.png")
-async def serve_icon_512():
-    """Serve 512x512 icon"""
-    icon_file = BASE_DIR / "icon-512.png"
-    if icon_file.exists():
-        return FileResponse(icon_file, media_type="image/png")
-    return HTMLResponse("Icon not found", status_code=404)
-
-
-@app.get("/googlebe0bcdc73702fcd4.html")
-async def serve_google_verification():
-    """Serve Google verification file"""
-    verification_file = BASE_DIR / "googlebe0bcdc73702fcd4.html"
-    if verification_file.exists():
-        return FileResponse(verification_file, media_type="text/html")
-    return HTMLResponse("Google verification file not found", status_code=404)
-
-
-@app.get("/sitemap.xml")
-async def serve_sitemap():
-    """Serve sitemap.xml"""
-    sitemap_file = BASE_DIR / "sitemap.xml"
-    if sitemap_file.exists():
-        return FileResponse(sitemap_file, media_type="application/xml")
-    return HTMLResponse("Sitemap not found", status_code=404)
-
-
-@app.get("/robots.txt")
-async def serve_robots():
-    """Serve robots.txt"""
-    robots_file = BASE_DIR / "robots.txt"
-    if robots_file.exists():
-        return FileResponse(robots_file, media_type="text/plain")
-    return HTMLResponse("Robots.txt not found", status_code=404)
-
 
 #  ============================================================================
 #   API ENDPOINTS
@@ -387,50 +386,69 @@ async def serve_robots():
 @app.get("/vapid-public-key", response_model=VapidKeyResponse)
 async def get_vapid_public_key():
     """Get VAPID public key for push notifications"""
-    return VapidKeyResponse(public_key=VAPID_PUBLIC_KEY)
+    return Response(content=VAPID_PUBLIC_KEY_JSON, media_type="application/json")
 
 
 @app.get("/categories", response_model=List[CategoryInfo])
 async def get_categories():
     """Get list of available DMV categories"""
-    result = []
+    return Response(content=CATEGORIES_JSON, media_type="application/json")
 
-    for key, info in DMV_CATEGORIES.items():
-        category = CategoryInfo(
-            key=key,
-            name=info['name'],
-            description=info['description']
-        )
-        result.append(category)
 
-    return result
+#  The monitor rewrites availability once per category sweep, so polling clients
+#  within the same few seconds all share one database read and one serialization
+AVAILABILITY_TTL_SEC = 5
+AVAILABILITY_ADAPTER = TypeAdapter(List[AvailabilityItem])
+AVAILABILITY_CACHE = {"expires": 0.0, "content": b"[]", "gzipped": None, "lock": asyncio.Lock()}
 
 
 @app.get("/availability", response_model=List[AvailabilityItem])
-async def get_availability():
+async def get_availability(request: Request):
     """Get current appointment availability snapshot for UI"""
     try:
-        last_check = db.get_all_last_checks()
-        items: List[AvailabilityItem] = []
-
-        for item in last_check:
-            try:
-                items.append(AvailabilityItem(
-                    category=item['category'],
-                    location_name=item['location_name'],
-                    slots_count=item['has_slots'],
-                    last_checked=item['last_checked']
-                ))
-            except Exception:
-                continue
-
-        #  items.sort(key=lambda x: (x.location_name.lower(), x.category)) #NOTE: ordering is guaranteed by ORDER BY in get_all_last_checks() / (database.py)
-        return items
+        if time.monotonic() >= AVAILABILITY_CACHE["expires"]:
+            async with AVAILABILITY_CACHE["lock"]:
+                if time.monotonic() >= AVAILABILITY_CACHE["expires"]:
+                    content = AVAILABILITY_ADAPTER.dump_json(await asyncio.to_thread(load_availability))
+                    #  Compressed once per refresh instead of by the middleware on every poll
+                    AVAILABILITY_CACHE["gzipped"] = (
+                        gzip.compress(content, compresslevel=GZIP_LEVEL) if len(content) >= GZIP_MIN_SIZE else None
+                    )
+                    AVAILABILITY_CACHE["content"] = content
+                    AVAILABILITY_CACHE["expires"] = time.monotonic() + AVAILABILITY_TTL_SEC
+
+        headers = {"Cache-Control": f"public, max-age={AVAILABILITY_TTL_SEC}", "Vary": "Accept-Encoding"}
+        content = AVAILABILITY_CACHE["content"]
+        if AVAILABILITY_CACHE["gzipped"] and "gzip" in request.headers.get("accept-encoding", ""):
+            content = AVAILABILITY_CACHE["gzipped"]
+            headers["Content-Encoding"] = "gzip"
+
+        return Response(content=content, media_type="application/json", headers=headers)
     except Exception as e:
         logger.error(f"Error getting availability: {e}")
         raise HTTPException(status_code=500, detail="Failed to get availability")
 
 
+def load_availability() -> List[AvailabilityItem]:
+    """Read the availability snapshot from the database, skipping malformed rows"""
+    last_check = db.get_all_last_checks()
+    items: List[AvailabilityItem] = []
+
+    for item in last_check:
+        try:
+            items.append(AvailabilityItem(
+                category=item['category'],
+                location_name=item['location_name'],
+                slots_count=item['has_slots'],
+                last_checked=item['last_checked']
+            ))
+        except Exception:
+            continue
+
+    #  items.sort(key=lambda x: (x.location_name.lower(), x.category)) #NOTE: ordering is guaranteed by ORDER BY in get_all_last_checks() / (database.py)
+    return items
+
+
 @app.post("/subscriptions", response_model=SubscriptionResponse)
 async def create_subscription(subscription: SubscriptionRequest):
     """Create or update a subscription"""
@@ -449,7 +467,7 @@ async def create_subscription(subscription: SubscriptionRequest):
             raise HTTPException(status_code=400, detail="At least one location is required")
 
         #  Check if subscription exists
-        existing = db.get_subscription(subscription.user_id)
+        existing = await asyncio.to_thread(db.get_subscription, subscription.user_id)
 
         if existing:
             logger.info(f"Updating existing subscription for user: {subscription.user_id}")
@@ -457,7 +475,8 @@ async def create_subscription(subscription: SubscriptionRequest):
             logger.info(f"Creating new subscription for user: {subscription.user_id}")
 
         #  Save subscription
-        result = db.save_subscription(
+        result = await asyncio.to_thread(
+            db.save_subscription,
             user_id=subscription.user_id,
             push_subscription=subscription.push_subscription,
             categories=subscription.categories,
@@ -467,13 +486,7 @@ async def create_subscription(subscription: SubscriptionRequest):
 
         logger.info(f"Subscription saved successfully for user: {subscription.user_id}")
 
-        return SubscriptionResponse(
-            user_id=result['user_id'],
-            categories=result['categories'],
-            locations=result['locations'],
-            date_range_days=result['date_range_days'],
-            created_at=result['created_at']
-        )
+        return ORJSONResponse(content=subscription_payload(result))
 
     except HTTPException:
         raise
@@ -486,18 +499,12 @@ async def create_subscription(subscription: SubscriptionRequest):
 async def get_subscription(user_id: str):
     """Get a specific subscription"""
     try:
-        subscription = db.get_subscription(user_id)
+        subscription = await asyncio.to_thread(db.get_subscription, user_id)
 
         if not subscription:
             raise HTTPException(status_code=404, detail="Subscription not found")
 
-        return SubscriptionResponse(
-            user_id=subscription['user_id'],
-            categories=subscription.get('categories', []),
-            locations=subscription.get('locations', []),
-            date_range_days=subscription.get('date_range_days', 30),
-            created_at=subscription.get('created_at', datetime.now().isoformat())
-        )
+        return ORJSONResponse(content=subscription_payload(subscription))
     except HTTPException:
         raise
     except Exception as e:
@@ -509,7 +516,7 @@ async def get_subscription(user_id: str):
 async def delete_subscription(user_id: str):
     """Delete a subscription"""
     try:
-        success = db.delete_subscription(user_id)
+        success = await asyncio.to_thread(db.delete_subscription, user_id)
 
         if not success:
             raise HTTPException(status_code=404, detail="Subscription not found")
@@ -525,25 +532,23 @@ async def delete_subscription(user_id: str):
 
 
 @app.post("/subscriptions/{user_id}/test")
-async def test_notification(user_id: str):
-    """Send a test notification to user"""
+async def test_notification(user_id: str, background_tasks: BackgroundTasks):
+    """Queue a test notification to user"""
     try:
-        subscription = db.get_subscription(user_id)
+        subscription = await asyncio.to_thread(db.get_subscription, user_id)
 
         if not subscription:
             raise HTTPException(status_code=404, detail="Subscription not found")
 
-        success = send_push_notification(
+        background_tasks.add_task(
+            send_push_notification,
             subscription_info=subscription,
             title="DMV Monitor Test",
             body="Your notifications are working! You will receive alerts here when DMV appointments become available.",
             url="https://skiptheline.ncdot.gov/Webapp/Appointment/Index/a7ade79b-996d-4971-8766-97feb75254de"
         )
 
-        if success:
-            return {"message": "Test notification sent successfully"}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to send notification")
+        return {"message": "Test notification queued"}
     except HTTPException:
         raise
     except Exception as e:
@@ -559,7 +564,7 @@ async def test_notification(user_id: str):
 async def cleanup_old_subscriptions(max_age_hours: int = 72):
     """Remove subscriptions older than specified hours (admin endpoint)"""
     try:
-        removed = db.remove_old_subscriptions(max_age_hours)
+        removed = await asyncio.to_thread(db.remove_old_subscriptions, max_age_hours)
         if removed > 0:
             return {
                 "message": "Cleanup completed",
@@ -578,7 +583,7 @@ async def cleanup_old_subscriptions(max_age_hours: int = 72):
 async def get_locations_with_slots():
     """Get all locations that currently have available slots"""
     try:
-        locations = db.get_locations_with_slots()
+        locations = await asyncio.to_thread(db.get_locations_with_slots)
         return locations
     except Exception as e:
         logger.error(f"Error getting locations with slots: {e}")
@@ -594,6 +599,10 @@ async def health():
     return {"status": "ok"}
 
 
+#  Mounted last so it only sees paths no route above has claimed
+app.mount("/", PublicFiles(directory=BASE_DIR, files=PUBLIC_FILES), name="static")
+
+
 #  ============================================================================
 #  RUN SERVER
 #  ============================================================================
@@ -610,10 +619,21 @@ if __name__ == "__main__":
         logger.warning("Then set VAPID_PRIVATE_KEY and VAPID_PUBLIC_KEY environment variables")
         logger.warning("=" * 80)
 
+    #  Every worker, and this supervisor process too, holds its own pool of up to
+    #  10 connections, so the default stays well under PostgreSQL's max_connections.
+    #  An empty API_WORKERS= (as in .env.example) counts as unset
+    API_WORKERS = int(os.getenv("API_WORKERS") or min(os.cpu_count() or 1, 4))
+
     #  Run server
+    #  Workers need an import string so each process can load its own app
     uvicorn.run(
-        app,
+        "api:app",
         host="0.0.0.0",
         port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=API_WORKERS,
+        limit_concurrency=1000,
+        timeout_keep_alive=30,
         log_level="info"
     )
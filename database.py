@@ -1,11 +1,18 @@
-import json
 import psycopg2
 import psycopg2.extras
+import psycopg2.extensions
+import psycopg2.pool
+import atexit
 import os
+import queue
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 import logging
+import logging.handlers
 
 BASE_DIR = Path(__file__).resolve().parent
 LOGS_DIR = BASE_DIR / "shared" / "logs"
@@ -20,144 +27,427 @@ if not logger.handlers:
         "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
     )
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+
+    #  Callers only enqueue records, the listener thread writes the file
+    log_queue = queue.SimpleQueue()
+    log_listener = logging.handlers.QueueListener(log_queue, file_handler)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
 
 logger.propagate = False
 
+#  Other processes (API workers, the monitor) write subscriptions too, so cached
+#  rows are only trusted for a few seconds
+SUBSCRIPTION_CACHE_SIZE = 512
+SUBSCRIPTION_CACHE_TTL_SEC = 5
+
+#  Any id works as long as every process uses the same one
+INIT_LOCK_ID = 0x444D56
+
+#  The whole schema, sent as one batch and applied in one transaction. Every statement
+#  is idempotent and old layouts are migrated in place
+SCHEMA_SQL = f"""
+-- API workers and the monitor start together, only one may run the DDL at a time
+SELECT pg_advisory_xact_lock({INIT_LOCK_ID});
+
+-- Child tables and joins use the compact id, user_id stays the public key
+CREATE TABLE IF NOT EXISTS subscriptions (
+    id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    user_id TEXT NOT NULL UNIQUE,
+    push_subscription TEXT NOT NULL,
+    date_range_days INTEGER DEFAULT 30,
+    created_at TEXT NOT NULL,
+    last_notification_sent TEXT,
+    updated_at TEXT NOT NULL
+);
+
+-- Older databases are keyed by user_id, number their rows and move the
+-- primary key over. CASCADE drops the child tables' user_id foreign keys
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_schema = current_schema()
+                     AND table_name = 'subscriptions'
+                     AND column_name = 'id') THEN
+        ALTER TABLE subscriptions ADD COLUMN id BIGINT GENERATED ALWAYS AS IDENTITY;
+        ALTER TABLE subscriptions DROP CONSTRAINT subscriptions_pkey CASCADE;
+        ALTER TABLE subscriptions
+            ADD PRIMARY KEY (id),
+            ADD CONSTRAINT subscriptions_user_id_key UNIQUE (user_id);
+    END IF;
+END $$;
+
+-- remove_old_subscriptions deletes by age, a range scan instead of a full one
+CREATE INDEX IF NOT EXISTS idx_subscriptions_created_at ON subscriptions (created_at);
+
+CREATE TABLE IF NOT EXISTS subscription_categories (
+    subscription_id BIGINT NOT NULL REFERENCES subscriptions (id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    ordinal INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (subscription_id, category)
+);
+
+-- Created before the integer key, still holding user_id
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = current_schema()
+                 AND table_name = 'subscription_categories'
+                 AND column_name = 'user_id') THEN
+        ALTER TABLE subscription_categories ADD COLUMN subscription_id BIGINT;
+        UPDATE subscription_categories t SET subscription_id = s.id
+        FROM subscriptions s WHERE s.user_id = t.user_id;
+        DELETE FROM subscription_categories WHERE subscription_id IS NULL;
+        ALTER TABLE subscription_categories
+            DROP COLUMN user_id,
+            ALTER COLUMN subscription_id SET NOT NULL,
+            ADD PRIMARY KEY (subscription_id, category),
+            ADD FOREIGN KEY (subscription_id) REFERENCES subscriptions (id) ON DELETE CASCADE;
+    END IF;
+END $$;
+
+-- Position in the list as the subscriber sent it, reads return that order
+ALTER TABLE subscription_categories ADD COLUMN IF NOT EXISTS ordinal INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_subscription_categories_category ON subscription_categories (category);
+
+CREATE TABLE IF NOT EXISTS subscription_locations (
+    subscription_id BIGINT NOT NULL REFERENCES subscriptions (id) ON DELETE CASCADE,
+    location TEXT NOT NULL,
+    ordinal INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (subscription_id, location)
+);
+
+-- Created before the integer key, still holding user_id
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = current_schema()
+                 AND table_name = 'subscription_locations'
+                 AND column_name = 'user_id') THEN
+        ALTER TABLE subscription_locations ADD COLUMN subscription_id BIGINT;
+        UPDATE subscription_locations t SET subscription_id = s.id
+        FROM subscriptions s WHERE s.user_id = t.user_id;
+        DELETE FROM subscription_locations WHERE subscription_id IS NULL;
+        ALTER TABLE subscription_locations
+            DROP COLUMN user_id,
+            ALTER COLUMN subscription_id SET NOT NULL,
+            ADD PRIMARY KEY (subscription_id, location),
+            ADD FOREIGN KEY (subscription_id) REFERENCES subscriptions (id) ON DELETE CASCADE;
+    END IF;
+END $$;
+
+-- Position in the list as the subscriber sent it, reads return that order
+ALTER TABLE subscription_locations ADD COLUMN IF NOT EXISTS ordinal INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_subscription_locations_location ON subscription_locations (location);
+
+-- Older databases keep the lists as JSON arrays (TEXT or JSONB) on the
+-- subscription row, move them into the child tables once
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = current_schema()
+                 AND table_name = 'subscriptions'
+                 AND column_name = 'categories') THEN
+        INSERT INTO subscription_categories (subscription_id, category, ordinal)
+        SELECT s.id, e.value, e.ordinal
+        FROM subscriptions s,
+             jsonb_array_elements_text(s.categories::jsonb) WITH ORDINALITY AS e(value, ordinal)
+        ON CONFLICT DO NOTHING;
+
+        INSERT INTO subscription_locations (subscription_id, location, ordinal)
+        SELECT s.id, e.value, e.ordinal
+        FROM subscriptions s,
+             jsonb_array_elements_text(s.locations::jsonb) WITH ORDINALITY AS e(value, ordinal)
+        ON CONFLICT DO NOTHING;
+
+        ALTER TABLE subscriptions DROP COLUMN categories, DROP COLUMN locations;
+    END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS last_check (
+    id SERIAL PRIMARY KEY,
+    category TEXT NOT NULL,
+    location_name TEXT NOT NULL,
+    has_slots INTEGER DEFAULT 0,
+    last_checked TEXT NOT NULL,
+    UNIQUE(category, location_name)
+);
+
+-- Every sweep rewrites every row but only a few change has_slots. Free space
+-- on each page plus no index on last_checked lets the rest be HOT updates,
+-- which rewrite the row in place and skip all index maintenance
+ALTER TABLE last_check SET (fillfactor = 70);
+
+-- Few rows have slots at any time, a partial index serves get_locations_with_slots.
+-- It used to cover last_checked as well, which ruled out HOT updates
+DROP INDEX IF EXISTS idx_last_check_has_slots;
+CREATE INDEX IF NOT EXISTS idx_last_check_with_slots
+ON last_check (category, location_name)
+INCLUDE (has_slots)
+WHERE has_slots > 0;
+"""
+
+#  Subscription row with its category and location lists gathered from the child tables,
+#  each list in the order it was saved
+SUBSCRIPTION_SELECT = """
+    SELECT s.user_id, s.push_subscription, s.date_range_days, s.created_at,
+           s.last_notification_sent,
+           ARRAY(SELECT c.category FROM subscription_categories c
+                 WHERE c.subscription_id = s.id ORDER BY c.ordinal, c.category) AS categories,
+           ARRAY(SELECT l.location FROM subscription_locations l
+                 WHERE l.subscription_id = s.id ORDER BY l.ordinal, l.location) AS locations
+    FROM subscriptions s
+"""
+
+#  Prepared once on every pooled connection and run with EXECUTE, so PostgreSQL
+#  skips parsing and planning them on each call
+PREPARED_STATEMENTS = {
+    'get_subscription': SUBSCRIPTION_SELECT + " WHERE s.user_id = $1",
+    'upsert_subscription': """
+        INSERT INTO subscriptions
+        (user_id, push_subscription, date_range_days, created_at, updated_at)
+        VALUES ($1, $2, $3, $4, $4)
+        ON CONFLICT (user_id) DO UPDATE SET
+            push_subscription = EXCLUDED.push_subscription,
+            date_range_days = EXCLUDED.date_range_days,
+            updated_at = EXCLUDED.updated_at
+        RETURNING id, created_at, xmax = 0 AS inserted
+    """,
+    'clear_subscription_categories': "DELETE FROM subscription_categories WHERE subscription_id = $1",
+    'clear_subscription_locations': "DELETE FROM subscription_locations WHERE subscription_id = $1",
+    #  The whole list travels as one array parameter and is expanded server-side
+    'insert_subscription_categories': """
+        INSERT INTO subscription_categories (subscription_id, category, ordinal)
+        SELECT $1, value, ordinal FROM unnest($2::text[]) WITH ORDINALITY AS t(value, ordinal)
+        ON CONFLICT DO NOTHING
+    """,
+    'insert_subscription_locations': """
+        INSERT INTO subscription_locations (subscription_id, location, ordinal)
+        SELECT $1, value, ordinal FROM unnest($2::text[]) WITH ORDINALITY AS t(value, ordinal)
+        ON CONFLICT DO NOTHING
+    """,
+    'delete_subscription': "DELETE FROM subscriptions WHERE user_id = $1",
+    'get_all_last_checks': """
+        SELECT category, location_name, has_slots, last_checked
+        FROM last_check
+        ORDER BY location_name, category
+    """,
+    'get_locations_with_slots': """
+        SELECT category, location_name, has_slots AS slots_count, last_checked
+        FROM last_check
+        WHERE has_slots > 0
+    """,
+}
+
+#  Varies in length with the sweep, execute_values expands it
+UPSERT_LAST_CHECKS = """
+    INSERT INTO last_check (category, location_name, has_slots, last_checked)
+    VALUES %s
+    ON CONFLICT (category, location_name) DO UPDATE SET
+        has_slots = EXCLUDED.has_slots,
+        last_checked = EXCLUDED.last_checked
+"""
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Connection that remembers whether PREPARED_STATEMENTS exist in its session"""
+    prepared = False
+
 
 class Database:
     """PostgreSQL database manager for DMV Monitor"""
 
-    def __init__(self, database_url: str = None):
+    def __init__(self, database_url: str = None, min_connections: int = 4,
+                 max_connections: int = 10):
         self.database_url = database_url or os.getenv("DATABASE_URL")
+        self._pool = None
+        #  The pool raises instead of waiting when it runs dry, so callers queue here
+        self._pool_slots = threading.BoundedSemaphore(max_connections)
+        #  user_id -> (expires, row), least recently used first
+        self._subscription_cache = OrderedDict()
+        self._subscription_cache_lock = threading.Lock()
+        #  (expires, count), kept current by this process's own writes in between
+        self._subscription_count = None
         if self.database_url:
+            #  Up to min_connections stay open between calls, keepalives stop idle ones
+            #  from being silently dropped by the network in between
+            self._pool = psycopg2.pool.ThreadedConnectionPool(
+                min_connections, max_connections, self.database_url,
+                connection_factory=PooledConnection,
+                cursor_factory=psycopg2.extras.RealDictCursor,
+                keepalives=1, keepalives_idle=60, keepalives_interval=10, keepalives_count=3
+            )
             self._init_database()
 
     def _get_connection(self):
-        conn = psycopg2.connect(self.database_url)
-        conn.cursor_factory = psycopg2.extras.RealDictCursor
-        return conn
+        self._pool_slots.acquire()
+        try:
+            return self._pool.getconn()
+        except Exception:
+            self._pool_slots.release()
+            raise
 
-    def _init_database(self):
+    def _get_prepared_connection(self):
+        """Connection with PREPARED_STATEMENTS available, for use once the schema exists"""
         conn = self._get_connection()
+        if conn.prepared:
+            return conn
         try:
             cursor = conn.cursor()
+            for name, sql in PREPARED_STATEMENTS.items():
+                cursor.execute(f"PREPARE {name} AS {sql}")
+            #  Prepared statements belong to the session and outlive the transaction
+            conn.commit()
+            conn.prepared = True
+            return conn
+        except Exception:
+            self._release_connection(conn)
+            raise
 
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS subscriptions (
-                    user_id TEXT PRIMARY KEY,
-                    push_subscription TEXT NOT NULL,
-                    categories TEXT NOT NULL,
-                    locations TEXT NOT NULL,
-                    date_range_days INTEGER DEFAULT 30,
-                    created_at TEXT NOT NULL,
-                    last_notification_sent TEXT,
-                    updated_at TEXT NOT NULL
-                )
-            """)
-
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS last_check (
-                    id SERIAL PRIMARY KEY,
-                    category TEXT NOT NULL,
-                    location_name TEXT NOT NULL,
-                    has_slots INTEGER DEFAULT 0,
-                    last_checked TEXT NOT NULL,
-                    UNIQUE(category, location_name)
-                )
-            """)
+    def _release_connection(self, conn):
+        """Return a connection to the pool, open transactions are rolled back by the pool"""
+        try:
+            self._pool.putconn(conn, close=conn.closed != 0)
+        finally:
+            self._pool_slots.release()
 
+    def _init_database(self):
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(SCHEMA_SQL)
             conn.commit()
             logger.info("Database initialized successfully")
 
         except Exception as e:
-            logger.error(f"Error initializing database: {e}")
+            logger.error("Error initializing database: %s", e)
             raise
         finally:
-            conn.close()
+            self._release_connection(conn)
 
-    def get_subscription(self, user_id: str) -> Optional[Dict]:
-        conn = self._get_connection()
+    def _cached_subscription(self, user_id: str):
+        with self._subscription_cache_lock:
+            entry = self._subscription_cache.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._subscription_cache[user_id]
+                return None
+            self._subscription_cache.move_to_end(user_id)
+            return entry
+
+    def _cache_subscription(self, user_id: str, subscription: Dict) -> None:
+        with self._subscription_cache_lock:
+            self._subscription_cache[user_id] = (
+                time.monotonic() + SUBSCRIPTION_CACHE_TTL_SEC, subscription
+            )
+            self._subscription_cache.move_to_end(user_id)
+            if len(self._subscription_cache) > SUBSCRIPTION_CACHE_SIZE:
+                self._subscription_cache.popitem(last=False)
+
+    def invalidate_subscription_cache(self, user_id: Optional[str] = None) -> None:
+        """Drop one cached subscription, or all of them when user_id is None"""
+        with self._subscription_cache_lock:
+            if user_id is None:
+                self._subscription_cache.clear()
+            else:
+                self._subscription_cache.pop(user_id, None)
+
+    def _adjust_subscription_count(self, delta: int) -> None:
+        with self._subscription_cache_lock:
+            if self._subscription_count is not None:
+                expires, count = self._subscription_count
+                self._subscription_count = (expires, max(count + delta, 0))
+
+    def get_subscription(self, user_id: str, cache: bool = True) -> Optional[Dict]:
+        #  Callers get their own copy, the cached row is never handed out to be mutated
+        if cache:
+            entry = self._cached_subscription(user_id)
+            if entry is not None:
+                return dict(entry[1])
+
+        conn = self._get_prepared_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute(
-                "SELECT * FROM subscriptions WHERE user_id = %s",
-                (user_id,)
-            )
+            cursor.execute("EXECUTE get_subscription (%s)", (user_id,))
             row = cursor.fetchone()
 
-            if not row:
-                return None
-
-            return {
+            subscription = None if not row else {
                 'user_id': row['user_id'],
                 'push_subscription': row['push_subscription'],
-                'categories': json.loads(row['categories']),
-                'locations': json.loads(row['locations']),
+                'categories': row['categories'],
+                'locations': row['locations'],
                 'date_range_days': row['date_range_days'],
                 'created_at': row['created_at'],
                 'last_notification_sent': row['last_notification_sent']
             }
         finally:
-            conn.close()
-
-    def get_all_subscriptions(self) -> List[Dict]:
-        conn = self._get_connection()
+            self._release_connection(conn)
+
+        #  Misses are not cached, another API worker may create the subscription any moment
+        if subscription is None:
+            return None
+        if cache:
+            self._cache_subscription(user_id, subscription)
+        return dict(subscription)
+
+    def iter_subscriptions(self, batch_size: int = 500) -> Iterator[Dict]:
+        """
+        Yield every subscription, fetched in batches through a server-side cursor
+        so the whole table is never held in memory at once.
+        """
+        conn = self._get_prepared_connection()
         try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM subscriptions")
-            rows = cursor.fetchall()
-
-            return [{
-                'user_id': row['user_id'],
-                'push_subscription': row['push_subscription'],
-                'categories': json.loads(row['categories']),
-                'locations': json.loads(row['locations']),
-                'date_range_days': row['date_range_days'],
-                'created_at': row['created_at'],
-                'last_notification_sent': row['last_notification_sent']
-            } for row in rows]
+            cursor = conn.cursor(name="iter_subscriptions")
+            cursor.itersize = batch_size
+            cursor.execute(SUBSCRIPTION_SELECT)
+            #  The select already has exactly the subscription fields, rows go out as they are
+            yield from cursor
         finally:
-            conn.close()
+            self._release_connection(conn)
+
+    def get_all_subscriptions(self) -> List[Dict]:
+        return list(self.iter_subscriptions())
 
     def save_subscription(self, user_id: str, push_subscription: Optional[str],
                           categories: List[str], locations: List[str],
                           date_range_days: int = 30) -> Dict:
-        conn = self._get_connection()
+        conn = self._get_prepared_connection()
         try:
             cursor = conn.cursor()
 
+            #  One timestamp serves as created_at for new rows and updated_at for all.
+            #  Taken in Python: the API and monitor run in America/New_York, PostgreSQL in UTC
+            now = datetime.now().isoformat()
+
+            #  created_at is left alone on conflict, RETURNING hands back the original one
+            cursor.execute(
+                "EXECUTE upsert_subscription (%s, %s, %s, %s)",
+                (user_id, push_subscription, date_range_days, now)
+            )
+            row = cursor.fetchone()
+            created_at = row['created_at']
+
+            subscription_id = row['id']
+
+            cursor.execute("EXECUTE clear_subscription_categories (%s)", (subscription_id,))
+            cursor.execute("EXECUTE clear_subscription_locations (%s)", (subscription_id,))
             cursor.execute(
-                "SELECT created_at FROM subscriptions WHERE user_id = %s",
-                (user_id,)
+                "EXECUTE insert_subscription_categories (%s, %s)",
+                (subscription_id, list(categories))
+            )
+            cursor.execute(
+                "EXECUTE insert_subscription_locations (%s, %s)",
+                (subscription_id, list(locations))
             )
-            existing = cursor.fetchone()
-
-            created_at = existing['created_at'] if existing else datetime.now().isoformat()
-            updated_at = datetime.now().isoformat()
-
-            cursor.execute("""
-                INSERT INTO subscriptions
-                (user_id, push_subscription, categories, locations,
-                 date_range_days, created_at, updated_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (user_id) DO UPDATE SET
-                    push_subscription = EXCLUDED.push_subscription,
-                    categories = EXCLUDED.categories,
-                    locations = EXCLUDED.locations,
-                    date_range_days = EXCLUDED.date_range_days,
-                    updated_at = EXCLUDED.updated_at
-            """, (
-                user_id,
-                push_subscription,
-                json.dumps(categories),
-                json.dumps(locations),
-                date_range_days,
-                created_at,
-                updated_at
-            ))
 
             conn.commit()
+            self.invalidate_subscription_cache(user_id)
+            if row['inserted']:
+                self._adjust_subscription_count(1)
 
             return {
                 'user_id': user_id,
@@ -170,30 +460,30 @@ class Database:
 
         except Exception as e:
             conn.rollback()
-            logger.error(f"Error saving subscription {user_id}: {e}")
+            logger.error("Error saving subscription %s: %s", user_id, e)
             raise
         finally:
-            conn.close()
+            self._release_connection(conn)
 
     def delete_subscription(self, user_id: str) -> bool:
-        conn = self._get_connection()
+        conn = self._get_prepared_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute(
-                "DELETE FROM subscriptions WHERE user_id = %s",
-                (user_id,)
-            )
+            cursor.execute("EXECUTE delete_subscription (%s)", (user_id,))
             conn.commit()
+            self.invalidate_subscription_cache(user_id)
+            if cursor.rowcount > 0:
+                self._adjust_subscription_count(-cursor.rowcount)
             return cursor.rowcount > 0
         except Exception as e:
             conn.rollback()
-            logger.error(f"Error deleting subscription {user_id}: {e}")
+            logger.error("Error deleting subscription %s: %s", user_id, e)
             raise
         finally:
-            conn.close()
+            self._release_connection(conn)
 
     def remove_old_subscriptions(self, max_age_hours: int) -> int:
-        conn = self._get_connection()
+        conn = self._get_prepared_connection()
         try:
             cursor = conn.cursor()
             cutoff = datetime.now() - timedelta(hours=max_age_hours)
@@ -205,96 +495,82 @@ class Database:
             conn.commit()
 
             if deleted_count > 0:
-                logger.info(f"Removed {deleted_count} outdated subscriptions")
+                self.invalidate_subscription_cache()
+                self._adjust_subscription_count(-deleted_count)
+                logger.info("Removed %d outdated subscriptions", deleted_count)
 
             return deleted_count
         except Exception as e:
             conn.rollback()
-            logger.error(f"Error removing old subscriptions: {e}")
+            logger.error("Error removing old subscriptions: %s", e)
             raise
         finally:
-            conn.close()
+            self._release_connection(conn)
 
     def get_subscriptions_count(self) -> int:
-        conn = self._get_connection()
+        with self._subscription_cache_lock:
+            cached = self._subscription_count
+        if cached is not None and cached[0] >= time.monotonic():
+            return cached[1]
+
+        conn = self._get_prepared_connection()
         try:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) as count FROM subscriptions")
-            row = cursor.fetchone()
-            return row['count']
+            count = cursor.fetchone()['count']
         finally:
-            conn.close()
+            self._release_connection(conn)
+
+        with self._subscription_cache_lock:
+            self._subscription_count = (time.monotonic() + SUBSCRIPTION_CACHE_TTL_SEC, count)
+        return count
 
     def get_all_last_checks(self) -> List[Dict]:
-        conn = self._get_connection()
+        conn = self._get_prepared_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT category, location_name, has_slots, last_checked
-                FROM last_check
-                ORDER BY location_name, category
-            """)
-            rows = cursor.fetchall()
-
-            return [{
-                'category': row['category'],
-                'location_name': row['location_name'],
-                'has_slots': row['has_slots'],
-                'last_checked': row['last_checked']
-            } for row in rows]
+            cursor.execute("EXECUTE get_all_last_checks")
+            #  RealDictCursor rows are dicts already
+            return cursor.fetchall()
         finally:
-            conn.close()
+            self._release_connection(conn)
 
     def save_slots_info(self, category: str, locations: List[str],
                         slots_data: List[Dict]) -> None:
-        conn = self._get_connection()
+        conn = self._get_prepared_connection()
         try:
             cursor = conn.cursor()
             timestamp = datetime.now().isoformat()
 
-            for location in locations:
-                cursor.execute("""
-                    INSERT INTO last_check (category, location_name, has_slots, last_checked)
-                    VALUES (%s, %s, 0, %s)
-                    ON CONFLICT (category, location_name) DO UPDATE SET
-                        has_slots = 0,
-                        last_checked = EXCLUDED.last_checked
-                """, (category, location, timestamp))
+            #  The snapshot is rewritten every sweep, so losing the last commit on a crash
+            #  is harmless and the commit need not wait for the WAL flush
+            cursor.execute("SET LOCAL synchronous_commit = off")
 
+            #  Every known location is reset to 0 unless this sweep found slots there.
+            #  Merged in Python so each row appears once and fits in a single statement
+            slots_by_location = dict.fromkeys(locations, 0)
             for slot in slots_data:
-                cursor.execute("""
-                    INSERT INTO last_check (category, location_name, has_slots, last_checked)
-                    VALUES (%s, %s, %s, %s)
-                    ON CONFLICT (category, location_name) DO UPDATE SET
-                        has_slots = EXCLUDED.has_slots,
-                        last_checked = EXCLUDED.last_checked
-                """, (category, slot['location'], slot['slots'], timestamp))
+                slots_by_location[slot['location']] = slot['slots']
+
+            psycopg2.extras.execute_values(cursor, UPSERT_LAST_CHECKS, [
+                (category, location, slots, timestamp)
+                for location, slots in slots_by_location.items()
+            ], page_size=max(len(slots_by_location), 1))
 
             conn.commit()
 
         except Exception as e:
-            logger.error(f"Error saving slots info: {e}")
+            logger.error("Error saving slots info: %s", e)
             conn.rollback()
             raise
         finally:
-            conn.close()
+            self._release_connection(conn)
 
     def get_locations_with_slots(self) -> List[Dict]:
-        conn = self._get_connection()
+        conn = self._get_prepared_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT category, location_name, has_slots, last_checked
-                FROM last_check
-                WHERE has_slots > 0
-            """)
-            rows = cursor.fetchall()
-
-            return [{
-                'category': row['category'],
-                'location_name': row['location_name'],
-                'slots_count': row['has_slots'],
-                'last_checked': row['last_checked']
-            } for row in rows]
+            cursor.execute("EXECUTE get_locations_with_slots")
+            return cursor.fetchall()
         finally:
-            conn.close()
+            self._release_connection(conn)
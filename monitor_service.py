@@ -1,24 +1,39 @@
 import asyncio
+import atexit
 import os
+import queue
+import re
 import json
 import logging
+import logging.handlers
 import base64
-from typing import List, Dict, Set
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
 from urllib.parse import urlparse
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from zoneinfo import ZoneInfo
-from playwright.async_api import async_playwright, Page, Locator
-from pywebpush import webpush
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Locator, Route
+import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 from database import Database
+from push import VapidSigner, check_push_response, encode_push, push_audience
 
 BASE_DIR = Path(__file__).resolve().parent
 load_dotenv(BASE_DIR / ".env")
 
 
+NOTIFICATION_TITLE = "🚗 New DMV appointment available!"
+NOTIFICATION_SLOTS_HEADER = "📅 Available slots:"
+
+
 class RestartRequiredException(Exception):
     pass
 
@@ -47,10 +62,14 @@ class Config:
         self.screenshot_folder = screenshots_dir
 
         self.calendar_page_text = "Please select date and time"
+        #  The inline datepicker only exists on the calendar page, a class match is
+        #  cheaper than scanning the page text for the heading
+        self.calendar_page_selector = ".ui-datepicker-inline"
         self.location_page_text = "Select a Location"
         self.category_page_text = "What kind of appointment do you need?"
         self.main_page_text = "Welcome to the NCDMV Driver Service Appointment Scheduler"
         self.privacy_act_statement_page_text = "Privacy Act Statement"
+        self.server_error_text = "Unfortunately, we have encountered an error"
         self.url = (
             "https://skiptheline.ncdot.gov/Webapp/Appointment/Index/"
             "a7ade79b-996d-4971-8766-97feb75254de"
@@ -59,15 +78,40 @@ class Config:
         #  VAPID settings
         self.vapid_private_key = os.getenv("VAPID_PRIVATE_KEY")
         self.vapid_subject = os.getenv("VAPID_SUBJECT")
+        self.max_push_concurrency = 32
 
         #  Subscriptions
         self.max_subscription_age_hours = 72
+        self.subscription_cache_ttl_sec = 60
 
         #  Browser
-        self.max_cycles_before_restart = 2
+        self.max_cycles_before_restart = 50
+        #  One full sweep of every category, the time two sweeps used to get under
+        #  the old 5 h watchdog
+        self.cycle_timeout_sec = 9000
+        #  Whole browser run, every cycle at its limit plus launch and shutdown
+        self.watchdog_timeout_sec = self.max_cycles_before_restart * self.cycle_timeout_sec + 600
 
         self.location_timeout_sec = 180
 
+        #  Pages scanning a category's locations side by side, each in its own context
+        #  because the scheduler keeps wizard state per session cookie
+        self.location_pages = 4
+
+        #  The scraper only reads text, so images, fonts, media and trackers are never
+        #  downloaded. The loading spinner stays, wait_for_spinner needs it to render.
+        #  Stylesheets stay too, visibility checks depend on them
+        self.blocked_resources = re.compile(
+            r"\.(png|jpe?g|gif|svg|webp|ico|bmp|woff2?|ttf|otf|eot|mp3|mp4|webm)(\?|#|$)",
+            re.IGNORECASE
+        )
+        self.blocked_hosts = re.compile(
+            r"^https?://([^/]*\.)?(googletagmanager\.com|google-analytics\.com|"
+            r"doubleclick\.net|adobedtm\.com|omtrdc\.net|demdex\.net)(/|:|$)",
+            re.IGNORECASE
+        )
+        self.spinner_image = "search-loading.gif"
+
         #  Categories and locations
         self.categories = [
             "Commercial Driver License (CDL or CLP)",
@@ -134,11 +178,19 @@ class Logger:
         self.logger = logging.getLogger(__name__)
 
     def _setup_logging(self):
+        #  Coroutines only enqueue records, the listener thread writes the file
+        log_queue = queue.SimpleQueue()
+        self.listener = logging.handlers.QueueListener(
+            log_queue,
+            logging.FileHandler(self.config.log_file, encoding="utf-8")
+        )
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
         logging.basicConfig(
-            filename=self.config.log_file,
             level=self.config.log_level,
             format="%(asctime)s [%(levelname)s] %(message)s",
-            encoding="utf-8"
+            handlers=[logging.handlers.QueueHandler(log_queue)]
         )
 
     def info(self, message: str):
@@ -156,11 +208,14 @@ class ScreenshotManager:
     def __init__(self, config: Config, logger: Logger):
         self.config = config
         self.logger = logger
-
-    async def take_screenshot(self, page: Page):
+        #  Decided once, callers then hit a no-op instead of checking the switch per error
         if not self.config.screenshot_switch:
-            return
+            self.take_screenshot = self._skip_screenshot
+
+    async def _skip_screenshot(self, page: Page):
+        return
 
+    async def take_screenshot(self, page: Page):
         try:
             if page.is_closed():
                 self.logger.warning("Cannot take screenshot: page is closed")
@@ -169,7 +224,9 @@ class ScreenshotManager:
             folder = self.config.screenshot_folder
             folder.mkdir(parents=True, exist_ok=True)
 
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+            now_ns = time.time_ns()
+            timestamp = (f"{time.strftime('%Y-%m-%d_%H-%M-%S', time.localtime(now_ns // 1_000_000_000))}"
+                         f"-{now_ns // 1000 % 1_000_000:06d}")
             filepath = folder / f"screenshot_{timestamp}.png"
 
             try:
@@ -194,15 +251,25 @@ class SubscriptionManager:
         self.config = config
         self.logger = logger
         self.db = db
+        #  Every (category, location) with slots asks for the subscriber list, one read
+        #  per cycle is enough
+        self._cache: Optional[List[Dict]] = None
+        self._cache_expires = 0.0
+        #  (category key, location) -> subscribers, built with the cache
+        self._index: Dict[Tuple[str, str], List[Dict]] = {}
+
+    def invalidate_cache(self):
+        self._cache = None
 
-    def remove_old_subscriptions(self) -> int:
+    async def remove_old_subscriptions(self) -> int:
         """Remove subscriptions older than max_subscription_age_hours"""
         try:
-            removed = self.db.remove_old_subscriptions(
-                self.config.max_subscription_age_hours
+            removed = await asyncio.to_thread(
+                self.db.remove_old_subscriptions, self.config.max_subscription_age_hours
             )
 
             if removed > 0:
+                self.invalidate_cache()
                 self.logger.info(f"Removed {removed} outdated subscriptions")
                 print(f"Removed {removed} expired subscriptions")
 
@@ -211,21 +278,85 @@ class SubscriptionManager:
             self.logger.warning(f"Error removing old subscriptions: {e}")
             return 0
 
-    def load_subscriptions(self) -> List[Dict]:
-        """Load all subscriptions from database"""
+    async def load_subscriptions(self) -> List[Dict]:
+        """Load all subscriptions, from the database at most once per subscription_cache_ttl_sec"""
+        now = time.monotonic()
+        if self._cache is not None and now < self._cache_expires:
+            return self._cache
+
         try:
-            subscriptions = self.db.get_all_subscriptions()
-            return subscriptions
+            #  Streaming the table runs in a worker thread, the location pages keep going
+            self._set_cache(await asyncio.to_thread(self.db.get_all_subscriptions))
+            self._cache_expires = now + self.config.subscription_cache_ttl_sec
+            return self._cache
         except Exception as e:
             self.logger.warning(f"[load_subscriptions] Error loading subscriptions: {e}")
             return []
 
+    def _set_cache(self, subscriptions: List[Dict]):
+        index: Dict[Tuple[str, str], List[Dict]] = {}
+        for item in subscriptions:
+            try:
+                if not item.get("push_subscription"):
+                    self.logger.warning(f"Subscriber {item.get('user_id')} has no push_subscription")
+                    continue
+
+                for category in item.get("categories", []):
+                    for location in item.get("locations", []):
+                        index.setdefault((category, location), []).append(item)
+
+            except Exception as e:
+                self.logger.warning(f"Skipping a corrupted subscription entry: {e}")
+
+        self._cache = subscriptions
+        self._index = index
+
+    async def subscribers_for(self, category_key: str, location: str) -> List[Dict]:
+        """Subscribers with a push subscription who follow this category at this location"""
+        await self.load_subscriptions()
+        return self._index.get((category_key, location), [])
+
+    def delete_subscription(self, user_id: str):
+        """Delete from the database only, safe to run in a worker thread"""
+        self.db.delete_subscription(user_id)
+
+    def forget_subscription(self, subscription: Dict):
+        """
+        Drop a deleted subscriber from the cache. Runs on the event loop, so concurrent
+        deletes never interleave, and only touches the index entries that list them.
+        """
+        if self._cache is None:
+            return
+
+        user_id = subscription.get("user_id")
+        self._cache = [sub for sub in self._cache if sub.get("user_id") != user_id]
+        for category in subscription.get("categories", []):
+            for location in subscription.get("locations", []):
+                key = (category, location)
+                if key in self._index:
+                    self._index[key] = [sub for sub in self._index[key] if sub.get("user_id") != user_id]
+
 
 class PushNotificationService:
 
     def __init__(self, config: Config, logger: Logger):
         self.config = config
         self.logger = logger
+        #  One keep-alive session per push service host, so TLS is negotiated once
+        #  per gateway instead of once per notification
+        self._sessions: Dict[str, requests.Session] = {}
+        self._sessions_lock = threading.Lock()
+        self._vapid_signer = VapidSigner(self.config.vapid_private_key, self.config.vapid_subject)
+
+    def _session(self, host: str) -> requests.Session:
+        with self._sessions_lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                pool_size = self.config.max_push_concurrency
+                session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+                self._sessions[host] = session
+            return session
 
     def send_push(self, subscription_json: str, title: str, body: str) -> bool:
         try:
@@ -236,21 +367,6 @@ class PushNotificationService:
                 self.logger.warning("Push error: empty endpoint")
                 return False
 
-            if "apple.com" in endpoint:
-                aud = "https://web.push.apple.com"
-            elif "fcm.googleapis.com" in endpoint:
-                aud = "https://fcm.googleapis.com"
-            elif "mozilla.com" in endpoint:
-                aud = "https://updates.push.services.mozilla.com"
-            else:
-                parsed = urlparse(endpoint)
-                aud = f"{parsed.scheme}://{parsed.netloc}"
-
-            vapid_claims = {
-                "sub": self.config.vapid_subject,
-                "aud": aud,
-            }
-
             notification_data = {
                 "title": title,
                 "body": body,
@@ -263,12 +379,15 @@ class PushNotificationService:
                 },
             }
 
-            webpush(
-                subscription_info=subscription,
-                data=json.dumps(notification_data),
-                vapid_private_key=self.config.vapid_private_key,
-                vapid_claims=vapid_claims,
+            #  Only the payload encryption is per subscriber, the VAPID signature is cached
+            data, headers = encode_push(
+                subscription, json.dumps(notification_data), self._vapid_signer.headers(push_audience(endpoint))
+            )
+
+            response = self._session(urlparse(endpoint).netloc).post(
+                endpoint, data=data, headers=headers, timeout=10
             )
+            check_push_response(response, response.reason)
             return True
 
         except Exception as e:
@@ -287,76 +406,57 @@ class NotificationManager:
         self.logger = logger
         self.subscription_manager = subscription_manager
         self.push_service = push_service
+        self._push_slots = asyncio.Semaphore(config.max_push_concurrency)
+        #  asyncio's default executor has too few threads to keep every slot busy
+        self._push_executor = ThreadPoolExecutor(
+            max_workers=config.max_push_concurrency, thread_name_prefix="push"
+        )
 
-    async def send_notification(self, category: str, location_name: str,
+    async def send_notification(self, category: str, mapped_category: str, location_name: str,
                                 total_slots: Dict[str, List[str]]) -> int:
         if not total_slots:
             return 0
 
-        subscriptions = self.subscription_manager.load_subscriptions()
-        if not subscriptions:
-            return 0
-
-        mapped_category = self.config.category_map.get(category)
-
-        if not mapped_category:
-            self.logger.warning(f"No mapping found for category: {category}")
-            return 0
-
-        interested = []
-        for item in subscriptions:
-            try:
-                cats = item.get("categories", [])
-                locs = item.get("locations", [])
-                push_sub = item.get("push_subscription")
-                user_id = item.get("user_id")
-
-                if not push_sub:
-                    self.logger.warning(f"Subscriber {user_id} has no push_subscription")
-                    continue
-
-                if mapped_category in cats and location_name in locs:
-                    interested.append(item)
-
-            except Exception as e:
-                self.logger.warning(f"Skipping a corrupted subscription entry: {e}")
-
+        interested = await self.subscription_manager.subscribers_for(mapped_category, location_name)
         if not interested:
             self.logger.info(f"No subscribers for {category} / {location_name}")
             return 0
 
-        slots_lines = []
-        for date_key, times in total_slots.items():
-            times_str = ", ".join(times[:2])
-            if len(times) > 2:
-                times_str += f" (+{len(times) - 2} more)"
-            slots_lines.append(f"{date_key}: {times_str}")
-
-        display_lines = slots_lines[:3]
-        more_dates_suffix = ""
-        if len(slots_lines) > 3:
-            more_dates_suffix = f"\n(+{len(slots_lines) - 3} more dates)"
-
-        title = "🚗 New DMV appointment available!"
-        body = (
-            f"📋 {category}\n"
-            f"📍 {location_name}\n"
-            f"📅 Available slots:\n"
-            + "\n".join(display_lines)
-            + more_dates_suffix
+        #  Only the first three dates are shown, the rest are just counted
+        display_lines = [
+            f"{date_key}: {', '.join(times[:2])}" + (f" (+{len(times) - 2} more)" if len(times) > 2 else "")
+            for date_key, times in islice(total_slots.items(), 3)
+        ]
+        more_dates = len(total_slots) - 3
+        body = "\n".join([
+            f"📋 {category}",
+            f"📍 {location_name}",
+            NOTIFICATION_SLOTS_HEADER,
+            *display_lines,
+            *([f"(+{more_dates} more dates)"] if more_dates > 0 else []),
+        ])
+        title = NOTIFICATION_TITLE
+
+        #  Each push waits on its gateway, so subscribers are served concurrently
+        results = await asyncio.gather(
+            *(self._notify_subscriber(sub, title, body) for sub in interested)
         )
+        sent_count = sum(results)
 
-        sent_count = 0
-        max_attempts = 3
+        self.logger.info(f"Total successfully sent: {sent_count}")
+        return sent_count
 
-        for sub in interested:
-            push_subscription_json = sub.get("push_subscription")
-            user_id = sub.get("user_id", "unknown")
+    async def _notify_subscriber(self, sub: Dict, title: str, body: str) -> bool:
+        push_subscription_json = sub.get("push_subscription")
+        user_id = sub.get("user_id", "unknown")
+        max_attempts = 3
 
+        async with self._push_slots:
             ok = False
             for attempt in range(1, max_attempts + 1):
                 try:
-                    ok = await asyncio.to_thread(
+                    ok = await asyncio.get_running_loop().run_in_executor(
+                        self._push_executor,
                         self.push_service.send_push,
                         push_subscription_json,
                         title,
@@ -368,31 +468,30 @@ class NotificationManager:
 
                 if ok == "expired":
                     self.logger.warning(f"Subscription expired (410) for user {user_id} — deleting immediately")
-                    try:
-                        self.subscription_manager.db.delete_subscription(user_id)
-                    except Exception as ex:
-                        self.logger.warning(f"Failed to delete subscription {user_id}: {ex}")
-                    break
+                    await self._delete_subscriber(sub)
+                    return False
 
                 if ok:
-                    sent_count += 1
                     self.logger.info(f"Notification sent to user {user_id} (attempt {attempt})")
-                    break
+                    return True
 
                 self.logger.warning(f"Attempt {attempt}/{max_attempts} failed for user {user_id}")
                 if attempt < max_attempts:
                     await asyncio.sleep(2)
 
-            else:
-                # все 3 попытки провалились
-                self.logger.warning(f"All {max_attempts} attempts failed for user {user_id} — deleting subscription")
-                try:
-                    self.subscription_manager.db.delete_subscription(user_id)
-                except Exception as ex:
-                    self.logger.warning(f"Failed to delete subscription {user_id}: {ex}")
+            # все 3 попытки провалились
+            self.logger.warning(f"All {max_attempts} attempts failed for user {user_id} — deleting subscription")
+            await self._delete_subscriber(sub)
+            return False
 
-        self.logger.info(f"Total successfully sent: {sent_count}")
-        return sent_count
+    async def _delete_subscriber(self, sub: Dict):
+        user_id = sub.get("user_id", "unknown")
+        try:
+            #  Only the database call leaves the event loop, the cache is updated back on it
+            await asyncio.to_thread(self.subscription_manager.delete_subscription, user_id)
+            self.subscription_manager.forget_subscription(sub)
+        except Exception as ex:
+            self.logger.warning(f"Failed to delete subscription {user_id}: {ex}")
 
 
 class DataStorage:
@@ -411,7 +510,9 @@ class DataStorage:
             #  Map label -> key (fallback to the original value if already a key)
             category_key = self.config.category_map.get(category, category)
 
-            self.db.save_slots_info(
+            #  Off the event loop, the other location pages keep scanning meanwhile
+            await asyncio.to_thread(
+                self.db.save_slots_info,
                 category=category_key,
                 locations=self.config.locations,
                 slots_data=slots_data
@@ -431,10 +532,43 @@ class PageNavigator:
         self.config = config
         self.logger = logger
         self.screenshot_manager = screenshot_manager
+        #  Locators are lazy queries, so one per page and sentinel is built once and reused
+        #  for every wait on that page
+        self._sentinels: "weakref.WeakKeyDictionary[Page, Dict[str, Locator]]" = weakref.WeakKeyDictionary()
+
+    def sentinel(self, page: Page, expected) -> Locator:
+        locators = self._sentinels.setdefault(page, {})
+        expected = str(expected)
+        if expected not in locators:
+            if expected.startswith(("#", ".", "[")):
+                locators[expected] = page.locator(expected).first
+            else:
+                locators[expected] = page.get_by_text(expected).first
+        return locators[expected]
+
+    async def new_context(self, browser: Browser) -> BrowserContext:
+        context = await browser.new_context(
+            geolocation={"longitude": -78.65, "latitude": 35.78},
+            permissions=["geolocation"],
+        )
+        await self.block_unneeded_resources(context)
+        return context
+
+    async def block_unneeded_resources(self, context: BrowserContext):
+        async def abort(route: Route):
+            if self.config.spinner_image in route.request.url:
+                await route.continue_()
+            else:
+                await route.abort()
+
+        #  URL patterns rather than a catch-all route, so documents, scripts and XHRs
+        #  are never intercepted at all
+        await context.route(self.config.blocked_resources, abort)
+        await context.route(self.config.blocked_hosts, abort)
 
     async def wait_for_spinner(self, page: Page, appear_timeout: int = 1000,
                                disappear_timeout: int = 20000):
-        loader = page.locator('img[src*="search-loading.gif"]')
+        loader = page.locator(f'img[src*="{self.config.spinner_image}"]')
 
         try:
             await loader.wait_for(state="visible", timeout=appear_timeout)
@@ -472,10 +606,7 @@ class PageNavigator:
 
         expected_locator = None
         if expected_text is not None:
-            if isinstance(expected_text, str) and expected_text.startswith(("#", ".", "[")):
-                expected_locator = page.locator(expected_text).first
-            else:
-                expected_locator = page.get_by_text(str(expected_text)).first
+            expected_locator = self.sentinel(page, expected_text)
 
         for attempt in range(max_attempts):
             try:
@@ -496,12 +627,13 @@ class PageNavigator:
                 return True
 
             except Exception as e:
-                content = ""
+                #  Probe for the sentence instead of serializing the whole DOM
+                server_error = False
                 try:
-                    content = await page.content()
+                    server_error = await self.sentinel(page, self.config.server_error_text).count() > 0
                 except Exception:
                     pass
-                if "Unfortunately, we have encountered an error" in content:
+                if server_error:
                     self.logger.warning("Detected NCDMV 500 error page")
                     raise ServerErrorException() from e
 
@@ -517,12 +649,11 @@ class PageNavigator:
 
     async def go_back(self, page: Page, expected_text):
         try:
-            if isinstance(expected_text, str) and expected_text.startswith(("#", ".", "[")):
-                expected_locator = page.locator(expected_text)
-            else:
-                expected_locator = page.get_by_text(str(expected_text)).first
+            expected_locator = self.sentinel(page, expected_text)
 
-            await page.go_back()
+            #  The expected text is the real readiness signal, waiting for the load event
+            #  on top of it only adds the time the remaining subresources take
+            await page.go_back(wait_until="commit")
             await expected_locator.wait_for(state="visible", timeout=15000)
 
         except PlaywrightTimeoutError:
@@ -530,11 +661,16 @@ class PageNavigator:
 
     async def open_main_page(self, page: Page, url: str):
         try:
-            await page.goto(url, timeout=60000)
-            await page.get_by_text(self.config.main_page_text).first.wait_for(timeout=15000)
+            await page.goto(url, timeout=60000, wait_until="domcontentloaded")
+            await self.sentinel(page, self.config.main_page_text).wait_for(timeout=15000)
         except Exception:
             raise RestartRequiredException()
 
+    async def open_category_selection(self, page: Page):
+        await self.open_main_page(page, self.config.url)
+        await self.safe_click(page, 'Make an Appointment', self.config.category_page_text)
+        await self.safe_click(page, 'Continue', self.config.privacy_act_statement_page_text)
+
 
 class SlotChecker:
 
@@ -585,7 +721,9 @@ class SlotChecker:
             ".ui-datepicker-inline.ui-datepicker.ui-widget.ui-widget-content"
         )
         active_days = calendar.locator("td[data-handler='selectDay']")
-        total_active_days_num = await active_days.count()
+        #  Every day number in one round trip, the cells are still clicked one by one
+        days = [int(text.strip()) for text in await active_days.locator("a").all_inner_texts()]
+        total_active_days_num = len(days)
 
         self.logger.info(f"Active days found: {total_active_days_num}")
 
@@ -594,9 +732,8 @@ class SlotChecker:
         if total_active_days_num == 0:
             return month_time_slots
 
-        for idx in range(total_active_days_num):
+        for idx, day in enumerate(days):
             cell = active_days.nth(idx)
-            day = int((await cell.locator("a").inner_text()).strip())
 
             self.logger.info(f"Clicking on day {day}")
             await self.page_navigator.safe_click(page, cell)
@@ -604,18 +741,10 @@ class SlotChecker:
 
             time_list = page.locator("select").first
             time_options = time_list.locator("option")
-            option_nums = await time_options.count()
-
-            times = []
 
-            for i in range(option_nums):
-                option = time_options.nth(i)
-                text = (await option.inner_text()).strip()
-
-                if not text or text == "-":
-                    continue
-
-                times.append(text)
+            #  All option labels in one round trip instead of one inner_text() per option
+            option_texts = await time_options.evaluate_all("options => options.map(option => option.text)")
+            times = [text.strip() for text in option_texts if text.strip() not in ("", "-")]
 
             if not times:
                 continue
@@ -641,27 +770,87 @@ class LocationChecker:
         self.data_storage = data_storage
         self.screenshot_manager = screenshot_manager
 
-    async def check_locations(self, page: Page, category: str):
-        visited_locations: Set[str] = set()
+    async def check_locations(self, page: Page, category: str, mapped_category: str):
         slots_data = []
 
-        for location in self.config.locations:
-            if location in visited_locations:
-                continue
+        #  Text of every active location card in one round trip, matched the way
+        #  has_text= does (case-insensitive substring, whitespace collapsed)
+        card_texts = [
+            " ".join(text.split()).lower()
+            for text in await page.locator(".QflowObjectItem.Active-Unit").all_text_contents()
+        ]
+        active_locations = [
+            location for location in dict.fromkeys(self.config.locations)
+            if any(location.lower() in text for text in card_texts)
+        ]
 
-            loc = page.locator(".QflowObjectItem.Active-Unit", has_text=location).first
+        if active_locations:
+            pending = asyncio.Queue()
+            for location in active_locations:
+                pending.put_nowait(location)
+
+            #  This page starts right away, helper pages join once they reach the category
+            workers = [self._scan_locations(page, category, mapped_category, pending, slots_data)]
+            helper_pages = min(self.config.location_pages, len(active_locations)) - 1
+            workers += [
+                self._scan_locations_in_new_context(
+                    page.context.browser, category, mapped_category, pending, slots_data
+                )
+                for _ in range(helper_pages)
+            ]
+
+            tasks = [asyncio.create_task(worker) for worker in workers]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
 
-            if await loc.count() == 0:
-                continue
+            #  A helper that failed after this page ran out of work put its location back
+            await self._scan_locations(page, category, mapped_category, pending, slots_data)
+
+        if not slots_data:
+            self.logger.info(f"No active locations in {category}")
+
+        await self.data_storage.save_slots_info(category, slots_data)
+
+    async def _scan_locations_in_new_context(self, browser: Browser, category: str, mapped_category: str,
+                                             pending: asyncio.Queue, slots_data: List[Dict]):
+        """
+        Helper worker with its own session. Its failures only stop this worker,
+        the location it was on goes back to the queue for the other pages.
+        """
+        context = await self.page_navigator.new_context(browser)
+        try:
+            page = await context.new_page()
+            await self.page_navigator.open_category_selection(page)
+            await self.page_navigator.safe_click(page, category, self.config.location_page_text)
+
+            await self._scan_locations(page, category, mapped_category, pending, slots_data)
 
-            visited_locations.add(location)
+        except Exception as e:
+            self.logger.warning(f"Helper page stopped in {category}: {e}")
+
+        finally:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    async def _scan_locations(self, page: Page, category: str, mapped_category: str,
+                              pending: asyncio.Queue, slots_data: List[Dict]):
+        while not pending.empty():
+            location = pending.get_nowait()
+            loc = page.locator(".QflowObjectItem.Active-Unit", has_text=location).first
 
             self.logger.info(f"Entering location: {location}")
 
+            recorded = False
             try:
                 try:
                     await asyncio.wait_for(
-                        self.page_navigator.safe_click(page, loc, self.config.calendar_page_text),
+                        self.page_navigator.safe_click(page, loc, self.config.calendar_page_selector),
                         timeout=self.config.location_timeout_sec
                     )
 
@@ -693,9 +882,18 @@ class LocationChecker:
 
                 total_slots_nums = sum(len(times) for times in total_slots.values())
 
-                await self.notification_manager.send_notification(category, location, total_slots)
+                await self.notification_manager.send_notification(
+                    category, mapped_category, location, total_slots
+                )
 
                 slots_data.append({"location": location, "slots": total_slots_nums})
+                recorded = True
+
+            except BaseException:
+                #  Unchecked rather than reported as empty, another page takes it over
+                if not recorded:
+                    pending.put_nowait(location)
+                raise
 
             finally:
                 try:
@@ -709,11 +907,6 @@ class LocationChecker:
 
             self.logger.info(f"Exited calendar: {location}")
 
-        if not slots_data:
-            self.logger.info(f"No active locations in {category}")
-
-        await self.data_storage.save_slots_info(category, slots_data)
-
 
 class CategoryChecker:
 
@@ -726,19 +919,23 @@ class CategoryChecker:
         self.screenshot_manager = screenshot_manager
 
     async def check_category(self, page: Page):
-        await self.page_navigator.open_main_page(page, self.config.url)
-        await self.page_navigator.safe_click(page, 'Make an Appointment', self.config.category_page_text)
-        await self.page_navigator.safe_click(page, 'Continue', self.config.privacy_act_statement_page_text)
+        await self.page_navigator.open_category_selection(page)
         self.logger.info("Opened category selection")
 
         for category in self.config.categories:
+            #  Nobody can subscribe to an unmapped category, it is not worth a visit
+            mapped_category = self.config.category_map.get(category)
+            if not mapped_category:
+                self.logger.warning(f"No mapping found for category: {category}")
+                continue
+
             self.logger.info(f"Processing category: {category}")
 
             try:
                 await self.page_navigator.safe_click(page, category, self.config.location_page_text)
                 self.logger.info(f"Entered category: {category}")
 
-                await self.location_checker.check_locations(page, category)
+                await self.location_checker.check_locations(page, category, mapped_category)
 
                 await self.page_navigator.go_back(page, self.config.category_page_text)
 
@@ -779,19 +976,28 @@ class DMVMonitor:
             self.config, self.logger, self.page_navigator, self.location_checker,
             self.screenshot_manager
         )
+        #  Failures in a row, a healthy restart waits for nothing and each failure doubles the pause
+        self._consecutive_errors = 0
+
+    async def _backoff(self):
+        if self._consecutive_errors:
+            await asyncio.sleep(min(2 ** self._consecutive_errors, 60))
 
     async def run(self):
         while True:
             try:
-                await asyncio.wait_for(self._run_once(), timeout=18000)
+                await asyncio.wait_for(self._run_once(), timeout=self.config.watchdog_timeout_sec)
             except asyncio.TimeoutError:
                 self.logger.warning("Global watchdog timeout — force restarting")
+                self._consecutive_errors += 1
+                await self._backoff()
             except asyncio.CancelledError:
                 self.logger.warning("Monitor cancelled — exiting")
                 return
             except Exception as e:
                 self.logger.warning(f"Global error: {e}")
-            await asyncio.sleep(10)
+                self._consecutive_errors += 1
+                await self._backoff()
 
     async def _run_once(self):
         async with async_playwright() as p:
@@ -800,46 +1006,59 @@ class DMVMonitor:
                 browser = await p.chromium.launch(headless=True)
                 self.logger.info("Browser started")
 
+                #  One context lives as long as the browser, each cycle only gets a fresh page
+                context = await self.page_navigator.new_context(browser)
+
                 cycles_count = 0
                 max_cycles = self.config.max_cycles_before_restart
 
                 while cycles_count < max_cycles:
-                    context = None
+                    page = None
                     try:
-                        context = await browser.new_context(
-                            geolocation={"longitude": -78.65, "latitude": 35.78},
-                            permissions=["geolocation"],
-                        )
-
                         page = await context.new_page()
 
-                        self.subscription_manager.remove_old_subscriptions()
+                        await self.subscription_manager.remove_old_subscriptions()
+                        self.subscription_manager.invalidate_cache()
                         cycles_count += 1
                         self.logger.info(f"Cycle {cycles_count} of {max_cycles}")
 
-                        await self.category_checker.check_category(page)
+                        #  A stuck sweep is cut off on its own, the browser run around it goes on
+                        #  through a restart instead of waiting for the global watchdog
+                        await asyncio.wait_for(
+                            self.category_checker.check_category(page),
+                            timeout=self.config.cycle_timeout_sec
+                        )
+                        self._consecutive_errors = 0
+
+                    except asyncio.TimeoutError:
+                        self.logger.warning("Cycle timeout — restarting browser")
+                        self._consecutive_errors += 1
+                        break
 
                     except RestartRequiredException as e:
                         self.logger.warning(f"RestartRequired — restarting browser: {e}")
+                        self._consecutive_errors += 1
                         break
 
                     except ServerErrorException as e:
                         self.logger.warning(f"ServerError — restarting browser: {e}")
+                        self._consecutive_errors += 1
                         break
 
                     except Exception as e:
                         self.logger.warning(f"Unexpected error — restarting browser: {e}")
+                        self._consecutive_errors += 1
                         break
 
                     finally:
-                        if context:
+                        if page:
                             try:
-                                await context.close()
+                                await page.close()
+                                #  Every cycle still starts a new scheduler session
+                                await context.clear_cookies()
                             except Exception:
                                 pass
 
-                        await asyncio.sleep(2)
-
                 self.logger.info("Restarting browser...")
 
             except asyncio.CancelledError:
@@ -848,6 +1067,7 @@ class DMVMonitor:
 
             except Exception as e:
                 self.logger.error(f"Critical browser error: {e}")
+                self._consecutive_errors += 1
 
             finally:
                 if browser:
@@ -856,7 +1076,7 @@ class DMVMonitor:
                     except Exception:
                         pass
 
-                await asyncio.sleep(5)
+                await self._backoff()
 
 
 if __name__ == "__main__":
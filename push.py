@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+from py_vapid import Vapid
+from pywebpush import WebPusher, WebPushException
+
+#  VAPID audience per push service host, other hosts are their own audience
+PUSH_AUDIENCES = {
+    "web.push.apple.com": "https://web.push.apple.com",
+    "fcm.googleapis.com": "https://fcm.googleapis.com",
+    "updates.push.services.mozilla.com": "https://updates.push.services.mozilla.com",
+}
+
+
+def push_audience(endpoint: str) -> str:
+    """VAPID aud claim for a push endpoint"""
+    parsed = urlparse(endpoint)
+    return PUSH_AUDIENCES.get(parsed.netloc) or f"{parsed.scheme}://{parsed.netloc}"
+
+
+def encode_push(subscription: Dict, payload: Union[str, bytes],
+                vapid_headers: Dict) -> Tuple[bytes, Dict]:
+    """Encrypt a payload for one subscriber, returns the request body and headers to post it with"""
+    encoded = WebPusher(subscription).encode(payload)
+    headers = {
+        **vapid_headers,
+        "Content-Encoding": "aes128gcm",
+        "TTL": "0",
+    }
+    return encoded["body"], headers
+
+
+def check_push_response(response, reason: str) -> None:
+    """Raise WebPushException when the push service did not accept the message"""
+    if response.status_code > 202:
+        raise WebPushException(f"Push failed: {response.status_code} {reason}", response=response)
+
+
+def load_vapid(private_key: str) -> Vapid:
+    """VAPID key from a PEM file path or from the key itself, the two forms pywebpush accepts"""
+    if os.path.isfile(private_key):
+        return Vapid.from_file(private_key)
+    return Vapid.from_string(private_key=private_key)
+
+
+class VapidSigner:
+    """
+    Signed VAPID headers per audience. One signature serves every subscriber of a push
+    service until shortly before it expires, the key itself is imported once.
+    """
+
+    def __init__(self, private_key: Optional[str], subject: Optional[str],
+                 lifetime_sec: int = 12 * 60 * 60, refresh_before_sec: int = 300):
+        self.private_key = private_key
+        self.subject = subject
+        self.lifetime_sec = lifetime_sec
+        self.refresh_before_sec = refresh_before_sec
+        self._vapid: Optional[Vapid] = None
+        #  aud -> (signed headers, expiry)
+        self._cache: Dict[str, Tuple[dict, int]] = {}
+        self._lock = threading.Lock()
+
+    def headers(self, aud: str) -> dict:
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(aud)
+            if cached is not None and cached[1] - self.refresh_before_sec > now:
+                return cached[0]
+
+            if self._vapid is None:
+                if not self.private_key:
+                    raise ValueError("VAPID_PRIVATE_KEY is not set")
+                self._vapid = load_vapid(self.private_key)
+
+            expires = int(now) + self.lifetime_sec
+            headers = self._vapid.sign({
+                "sub": self.subject,
+                "aud": aud,
+                "exp": expires,
+            })
+            self._cache[aud] = (headers, expires)
+            return headers
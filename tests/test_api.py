@@ -1,3 +1,6 @@
+import os
+
+
 def test_health(client):
     response = client.get("/health")
     assert response.status_code == 200
@@ -80,3 +83,147 @@ def test_delete_subscription(client):
 def test_delete_nonexistent_subscription(client):
     response = client.delete("/subscriptions/nobody-here")
     assert response.status_code == 404
+
+
+def test_cleanup_requires_admin_token(client):
+    response = client.delete("/maintenance/cleanup-old-subscriptions")
+    assert response.status_code == 401
+
+    response = client.delete("/maintenance/cleanup-old-subscriptions",
+                             headers={"X-Admin-Token": "wrong_token"})
+    assert response.status_code == 401
+
+
+def test_cleanup_with_admin_token(client):
+    import api
+    api.db.remove_old_subscriptions.return_value = 0
+
+    response = client.delete("/maintenance/cleanup-old-subscriptions",
+                             headers={"X-Admin-Token": os.environ["ADMIN_TOKEN"]})
+    assert response.status_code == 200
+
+
+def test_test_notification_is_queued(client, monkeypatch):
+    import api
+    from unittest.mock import AsyncMock
+
+    send = AsyncMock(return_value=True)
+    monkeypatch.setattr(api, "send_push_notification", send)
+
+    payload = {
+        "user_id": "user-to-notify",
+        "push_subscription": '{"endpoint":"https://fcm.googleapis.com/test","keys":{"p256dh":"test","auth":"test"}}',
+        "categories": ["state_identification_card"],
+        "locations": ["Cary"],
+        "date_range_days": 7
+    }
+    client.post("/subscriptions", json=payload)
+
+    response = client.post("/subscriptions/user-to-notify/test")
+    assert response.status_code == 200
+    send.assert_awaited_once()
+
+    response = client.post("/subscriptions/nobody-here/test")
+    assert response.status_code == 404
+
+
+def test_static_assets_served(client):
+    response = client.get("/app.js")
+    assert response.status_code == 200
+    assert "javascript" in response.headers["content-type"]
+
+    response = client.get("/manifest.json")
+    assert response.status_code == 200
+
+
+def test_sources_not_served(client):
+    for path in ("/api.py", "/database.py", "/.env", "/requirements.txt"):
+        assert client.get(path).status_code == 404
+
+
+def test_static_assets_revalidate_with_etag(client):
+    response = client.get("/sw.js")
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.headers["service-worker-allowed"] == "/"
+
+    response = client.get("/sw.js", headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+    assert response.headers["cache-control"] == "no-cache"
+
+
+def test_get_vapid_public_key(client):
+    response = client.get("/vapid-public-key")
+    assert response.status_code == 200
+    assert response.json() == {"public_key": os.environ["VAPID_PUBLIC_KEY"]}
+
+
+def test_availability_is_cached(client, monkeypatch):
+    import api
+    from unittest.mock import MagicMock
+
+    get_all_last_checks = MagicMock(return_value=[{
+        "category": "motorcycle_skills_test",
+        "location_name": "Cary",
+        "has_slots": 3,
+        "last_checked": "2024-01-01T00:00:00"
+    }])
+    monkeypatch.setattr(api.db, "get_all_last_checks", get_all_last_checks)
+    monkeypatch.setitem(api.AVAILABILITY_CACHE, "expires", 0.0)
+
+    first = client.get("/availability")
+    second = client.get("/availability")
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json() == [{
+        "category": "motorcycle_skills_test",
+        "location_name": "Cary",
+        "slots_count": 3,
+        "last_checked": "2024-01-01T00:00:00"
+    }]
+    assert "max-age" in first.headers["cache-control"]
+    get_all_last_checks.assert_called_once()
+
+    monkeypatch.setitem(api.AVAILABILITY_CACHE, "expires", 0.0)
+
+
+def test_large_availability_is_gzipped(client, monkeypatch):
+    import api
+    from unittest.mock import MagicMock
+
+    rows = [{
+        "category": "existing_driver_license",
+        "location_name": f"Location {i}",
+        "has_slots": i,
+        "last_checked": "2024-01-01T00:00:00"
+    } for i in range(50)]
+    monkeypatch.setattr(api.db, "get_all_last_checks", MagicMock(return_value=rows))
+    monkeypatch.setitem(api.AVAILABILITY_CACHE, "expires", 0.0)
+
+    response = client.get("/availability", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 50
+
+    monkeypatch.setitem(api.AVAILABILITY_CACHE, "expires", 0.0)
+
+
+def test_subscription_response_hides_push_subscription(client):
+    payload = {
+        "user_id": "test-user-fields",
+        "push_subscription": '{"endpoint":"https://fcm.googleapis.com/test","keys":{"p256dh":"test","auth":"test"}}',
+        "categories": ["medical_reexam"],
+        "locations": ["Boone"],
+        "date_range_days": 14
+    }
+    created = client.post("/subscriptions", json=payload).json()
+    fetched = client.get("/subscriptions/test-user-fields").json()
+
+    expected = {"user_id", "categories", "locations", "date_range_days", "created_at"}
+    assert set(created) == set(fetched) == expected
+
+
+def test_html_pages_served(client):
+    for path in ("/", "/customization-sheet"):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/html")
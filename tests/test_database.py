@@ -0,0 +1,123 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+import database
+from database import Database
+
+
+def subscription_row(user_id):
+    return {
+        'user_id': user_id,
+        'push_subscription': '{"endpoint": "e"}',
+        'categories': ["cdl"],
+        'locations': ["Cary"],
+        'date_range_days': 30,
+        'created_at': '2024-01-01T00:00:00',
+        'last_notification_sent': None,
+    }
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Database with no pool, every query goes to one MagicMock connection"""
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    db = Database()
+    db.conn = MagicMock()
+    db.cursor = db.conn.cursor.return_value
+    db._get_prepared_connection = MagicMock(return_value=db.conn)
+    db._release_connection = MagicMock()
+    return db
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(database.time, "monotonic", lambda: now[0])
+    return now
+
+
+def cache_subscription(db, user_id):
+    db.cursor.fetchone.return_value = subscription_row(user_id)
+    db.get_subscription(user_id)
+
+
+def test_subscription_miss_is_not_cached(db):
+    db.cursor.fetchone.return_value = None
+    assert db.get_subscription("u1") is None
+
+    db.cursor.fetchone.return_value = subscription_row("u1")
+    assert db.get_subscription("u1")["user_id"] == "u1"
+    assert db.cursor.execute.call_count == 2
+
+
+def test_cached_subscription_is_returned_as_copy(db):
+    db.cursor.fetchone.return_value = subscription_row("u1")
+    first = db.get_subscription("u1")
+    first["_scratch"] = True
+
+    second = db.get_subscription("u1")
+    assert "_scratch" not in second
+    assert db.cursor.execute.call_count == 1
+
+
+def test_subscription_cache_evicts_least_recently_used(db, monkeypatch):
+    monkeypatch.setattr(database, "SUBSCRIPTION_CACHE_SIZE", 2)
+    cache_subscription(db, "u1")
+    cache_subscription(db, "u2")
+    db.get_subscription("u1")
+    cache_subscription(db, "u3")
+
+    assert list(db._subscription_cache) == ["u1", "u3"]
+
+
+def test_subscription_cache_expires(db, clock):
+    cache_subscription(db, "u1")
+    clock[0] += database.SUBSCRIPTION_CACHE_TTL_SEC - 1
+    db.get_subscription("u1")
+    assert db.cursor.execute.call_count == 1
+
+    clock[0] += 2
+    db.get_subscription("u1")
+    assert db.cursor.execute.call_count == 2
+
+
+@pytest.mark.parametrize("write", [
+    lambda db: db.save_subscription("u1", '{"endpoint": "e"}', ["cdl"], ["Cary"]),
+    lambda db: db.delete_subscription("u1"),
+    lambda db: db.remove_old_subscriptions(72),
+])
+def test_writes_invalidate_cached_subscription(db, write):
+    cache_subscription(db, "u1")
+    db.cursor.fetchone.return_value = {'id': 1, 'created_at': '2024-01-01T00:00:00', 'inserted': False}
+    db.cursor.rowcount = 1
+    write(db)
+
+    db.cursor.execute.reset_mock()
+    cache_subscription(db, "u1")
+    assert db.cursor.execute.call_count == 1
+
+
+def test_subscription_count_follows_own_writes(db, clock):
+    db.cursor.fetchone.return_value = {'count': 3}
+    assert db.get_subscriptions_count() == 3
+
+    db.cursor.fetchone.return_value = {'id': 1, 'created_at': '2024-01-01T00:00:00', 'inserted': True}
+    db.save_subscription("new", '{"endpoint": "e"}', ["cdl"], ["Cary"])
+    db.cursor.fetchone.return_value = {'id': 2, 'created_at': '2024-01-01T00:00:00', 'inserted': False}
+    db.save_subscription("existing", '{"endpoint": "e"}', ["cdl"], ["Cary"])
+    assert db.get_subscriptions_count() == 4
+
+    db.cursor.rowcount = 1
+    db.delete_subscription("new")
+    db.cursor.rowcount = 2
+    db.remove_old_subscriptions(72)
+    assert db.get_subscriptions_count() == 1
+
+    count_queries = [c for c in db.cursor.execute.call_args_list if "COUNT" in c.args[0]]
+    assert len(count_queries) == 1
+
+    clock[0] += database.SUBSCRIPTION_CACHE_TTL_SEC + 1
+    db.cursor.fetchone.return_value = {'count': 7}
+    assert db.get_subscriptions_count() == 7
+
@@ -0,0 +1,193 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import monitor_service
+
+
+def make_subscription_manager(subscriptions):
+    db = MagicMock()
+    db.get_all_subscriptions.return_value = subscriptions
+    config = MagicMock(subscription_cache_ttl_sec=60)
+    return monitor_service.SubscriptionManager(config, MagicMock(), db)
+
+
+def make_subscription(user_id, categories, locations, push_subscription='{"endpoint": "e"}'):
+    return {
+        "user_id": user_id,
+        "push_subscription": push_subscription,
+        "categories": categories,
+        "locations": locations,
+    }
+
+
+def test_concurrent_deletes_drop_every_subscriber():
+    subscriptions = [make_subscription(f"u{i}", ["cdl"], ["Cary", "Boone"]) for i in range(20)]
+    manager = make_subscription_manager(subscriptions)
+    asyncio.run(manager.load_subscriptions())
+
+    notification_manager = monitor_service.NotificationManager.__new__(monitor_service.NotificationManager)
+    notification_manager.logger = MagicMock()
+    notification_manager.subscription_manager = manager
+
+    async def delete_all():
+        await asyncio.gather(*(notification_manager._delete_subscriber(sub) for sub in subscriptions[:10]))
+
+    asyncio.run(delete_all())
+
+    remaining = [f"u{i}" for i in range(10, 20)]
+    assert [sub["user_id"] for sub in asyncio.run(manager.subscribers_for("cdl", "Cary"))] == remaining
+    assert [sub["user_id"] for sub in asyncio.run(manager.subscribers_for("cdl", "Boone"))] == remaining
+    assert [sub["user_id"] for sub in asyncio.run(manager.load_subscriptions())] == remaining
+    assert manager.db.delete_subscription.call_count == 10
+
+
+def test_subscriber_index_by_category_and_location():
+    with_push = make_subscription("u1", ["cdl", "permit"], ["Cary", "Boone"])
+    other = make_subscription("u2", ["cdl"], ["Cary"])
+    without_push = make_subscription("u3", ["cdl"], ["Cary"], push_subscription=None)
+    manager = make_subscription_manager([with_push, other, without_push])
+
+    assert asyncio.run(manager.subscribers_for("cdl", "Cary")) == [with_push, other]
+    assert asyncio.run(manager.subscribers_for("permit", "Boone")) == [with_push]
+    assert asyncio.run(manager.subscribers_for("permit", "Durham East")) == []
+    assert manager.db.get_all_subscriptions.call_count == 1
+
+
+def test_active_locations_match_cards_like_has_text():
+    config = MagicMock(locations=["Cary", "Durham East", "Boone", "Cary"], location_pages=1)
+    checker = monitor_service.LocationChecker(
+        config, MagicMock(), MagicMock(), MagicMock(), MagicMock(), MagicMock(), MagicMock()
+    )
+    checker.data_storage.save_slots_info = AsyncMock()
+    page = MagicMock()
+    page.locator.return_value.all_text_contents = AsyncMock(return_value=[
+        "  CARY\n 301 Dillard Dr ",
+        "Durham\n   East 101 Main St",
+        "Raleigh North",
+    ])
+
+    scanned = []
+
+    async def scan(page, category, mapped_category, pending, slots_data):
+        while not pending.empty():
+            scanned.append(pending.get_nowait())
+
+    checker._scan_locations = scan
+    asyncio.run(checker.check_locations(page, "CDL", "cdl"))
+
+    assert scanned == ["Cary", "Durham East"]
+
+
+def send_notification(total_slots):
+    notification_manager = monitor_service.NotificationManager.__new__(monitor_service.NotificationManager)
+    notification_manager.logger = MagicMock()
+    notification_manager.subscription_manager = MagicMock()
+    notification_manager.subscription_manager.subscribers_for = AsyncMock(return_value=[{"user_id": "u1"}])
+    sent = []
+
+    async def notify(sub, title, body):
+        sent.append((title, body))
+        return True
+
+    notification_manager._notify_subscriber = notify
+    asyncio.run(notification_manager.send_notification("CDL", "cdl", "Cary", total_slots))
+    return sent
+
+
+def test_notification_body_lists_three_dates():
+    sent = send_notification({
+        "March 3, 2026": ["9:00", "9:15", "9:30", "9:45"],
+        "March 4, 2026": ["10:00", "10:15"],
+        "March 5, 2026": [],
+        "March 6, 2026": ["8:00"],
+        "March 7, 2026": ["8:30"],
+    })
+
+    assert sent == [(
+        "🚗 New DMV appointment available!",
+        "📋 CDL\n"
+        "📍 Cary\n"
+        "📅 Available slots:\n"
+        "March 3, 2026: 9:00, 9:15 (+2 more)\n"
+        "March 4, 2026: 10:00, 10:15\n"
+        "March 5, 2026: \n"
+        "(+2 more dates)"
+    )]
+
+
+def test_notification_body_without_more_dates():
+    sent = send_notification({"March 3, 2026": ["9:00", "9:15", "9:30"]})
+
+    assert sent[0][1] == "📋 CDL\n📍 Cary\n📅 Available slots:\nMarch 3, 2026: 9:00, 9:15 (+1 more)"
+
+
+def test_no_notification_without_slots():
+    assert send_notification({}) == []
+
+
+def test_restart_count_fits_inside_watchdog():
+    config = monitor_service.Config()
+
+    cycles_at_limit = config.max_cycles_before_restart * config.cycle_timeout_sec
+    assert cycles_at_limit < config.watchdog_timeout_sec
+
+
+def test_subscription_reads_and_cleanup_run_off_the_event_loop():
+    manager = make_subscription_manager([])
+    manager.config.max_subscription_age_hours = 72
+    threads = []
+    manager.db.get_all_subscriptions.side_effect = lambda: threads.append(threading.current_thread()) or []
+    manager.db.remove_old_subscriptions.side_effect = lambda hours: threads.append(threading.current_thread()) or 0
+
+    async def cycle():
+        await manager.remove_old_subscriptions()
+        await manager.subscribers_for("cdl", "Cary")
+
+    asyncio.run(cycle())
+
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+
+
+@pytest.mark.parametrize("helper_fails_after", [0, 0.05])
+def test_location_from_failed_helper_page_is_rescanned(helper_fails_after):
+    config = MagicMock(locations=["Cary", "Boone"], location_pages=2, location_timeout_sec=5)
+    page_navigator = MagicMock()
+    page_navigator.safe_click = AsyncMock()
+    page_navigator.go_back = AsyncMock()
+    page_navigator.open_category_selection = AsyncMock()
+    helper_page = MagicMock()
+    page_navigator.new_context = AsyncMock(return_value=MagicMock(
+        new_page=AsyncMock(return_value=helper_page), close=AsyncMock()
+    ))
+    notification_manager = MagicMock(send_notification=AsyncMock())
+    data_storage = MagicMock(save_slots_info=AsyncMock())
+    checker = monitor_service.LocationChecker(
+        config, MagicMock(), page_navigator, MagicMock(), notification_manager, data_storage, MagicMock()
+    )
+
+    page = MagicMock()
+    page.locator.return_value.all_text_contents = AsyncMock(return_value=["Cary", "Boone"])
+    scanned = []
+
+    async def check_slots(scan_page, location):
+        if scan_page is helper_page:
+            await asyncio.sleep(helper_fails_after)
+            raise monitor_service.RestartRequiredException("helper lost its session")
+        await asyncio.sleep(0.01)
+        scanned.append(location)
+        return {"March 3, 2026": ["9:00"]}
+
+    checker.slot_checker.check_slots = check_slots
+    asyncio.run(checker.check_locations(page, "CDL", "cdl"))
+
+    assert sorted(scanned) == ["Boone", "Cary"]
+    data_storage.save_slots_info.assert_awaited_once()
+    saved = data_storage.save_slots_info.await_args.args[1]
+    assert sorted(saved, key=lambda item: item["location"]) == [
+        {"location": "Boone", "slots": 1},
+        {"location": "Cary", "slots": 1},
+    ]
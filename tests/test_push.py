@@ -0,0 +1,56 @@
+from unittest.mock import MagicMock
+
+import pytest
+from py_vapid import Vapid, b64urlencode
+
+import push
+
+
+def test_push_audience_per_service():
+    assert push.push_audience("https://fcm.googleapis.com/fcm/send/abc") == "https://fcm.googleapis.com"
+    assert push.push_audience("https://push.example.org:8443/sub/1") == "https://push.example.org:8443"
+
+
+@pytest.mark.parametrize("status_code, accepted", [(201, True), (202, True), (410, False)])
+def test_check_push_response(status_code, accepted):
+    response = MagicMock(status_code=status_code)
+    if accepted:
+        push.check_push_response(response, "Created")
+    else:
+        with pytest.raises(push.WebPushException, match="410 Gone"):
+            push.check_push_response(response, "Gone")
+
+
+@pytest.fixture
+def vapid_private_key():
+    vapid = Vapid()
+    vapid.generate_keys()
+    return b64urlencode(vapid.private_key.private_numbers().private_value.to_bytes(32, "big"))
+
+
+def test_vapid_signer_reuses_headers_until_refresh(vapid_private_key, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(push.time, "time", lambda: now[0])
+    signer = push.VapidSigner(vapid_private_key, "mailto:test@test.com")
+
+    first = signer.headers("https://fcm.googleapis.com")
+    assert signer.headers("https://fcm.googleapis.com") is first
+    assert signer.headers("https://web.push.apple.com") is not first
+
+    now[0] += signer.lifetime_sec - signer.refresh_before_sec + 1
+    assert signer.headers("https://fcm.googleapis.com") is not first
+
+
+def test_vapid_signer_without_key():
+    with pytest.raises(ValueError):
+        push.VapidSigner(None, "mailto:test@test.com").headers("https://fcm.googleapis.com")
+
+
+def test_load_vapid_from_key_or_pem_file(vapid_private_key, tmp_path):
+    from_string = push.load_vapid(vapid_private_key)
+
+    pem_file = tmp_path / "private_key.pem"
+    from_string.save_key(str(pem_file))
+    from_file = push.load_vapid(str(pem_file))
+
+    assert from_file.private_key.private_numbers() == from_string.private_key.private_numbers()